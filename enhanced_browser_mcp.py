@@ -6,13 +6,29 @@ Features: Session manager, network inspector, smart selectors, better logging
 
 import asyncio
 import json
+import gzip
 import ssl
 import os
+import re
+import sys
 import logging
-from typing import Any, Optional, List, Dict
+import logging.handlers
+import atexit
+from typing import Any, Optional, List, Dict, Deque
+from collections import deque
+from itertools import islice
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
 from datetime import datetime
-import pickle
+import time
+from functools import lru_cache, wraps
+
+# Where screenshots are written (and served from by mcp_server_http)
+SCREENSHOT_DIR = "/app/screenshots"
 
 # ============================================================================
 # LOGGING SETUP
@@ -29,6 +45,15 @@ def setup_browser_logging():
     fh = logging.FileHandler("/app/logs/browser.log")
     fh.setLevel(logging.DEBUG)
     
+    # Buffer file writes: flush every 1000 records or on WARNING and above
+    buffered_fh = logging.handlers.MemoryHandler(
+        capacity=1000,
+        flushLevel=logging.WARNING,
+        target=fh
+    )
+    buffered_fh.setLevel(logging.DEBUG)
+    atexit.register(buffered_fh.flush)
+    
     # Console handler
     ch = logging.StreamHandler()
     ch.setLevel(logging.INFO)
@@ -41,7 +66,7 @@ def setup_browser_logging():
     fh.setFormatter(formatter)
     ch.setFormatter(formatter)
     
-    logger.addHandler(fh)
+    logger.addHandler(buffered_fh)
     logger.addHandler(ch)
     
     return logger
@@ -49,17 +74,74 @@ def setup_browser_logging():
 logger = setup_browser_logging()
 
 
+def flush_browser_logs():
+    """Write any buffered log records to disk"""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+# ============================================================================
+# JSON HELPERS
+# ============================================================================
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes (orjson when installed)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 # ============================================================================
 # NETWORK INSPECTOR
 # ============================================================================
 
+_intern = sys.intern
+
+
+@lru_cache(maxsize=1024)
+def _iso_second(seconds: int) -> str:
+    """ISO string for a whole second (events in the same second share it)"""
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def format_timestamp_ns(ts_ns: int) -> str:
+    """Format a time.time_ns() value like datetime.isoformat()"""
+    seconds, remainder = divmod(ts_ns, 1_000_000_000)
+    return f"{_iso_second(seconds)}.{remainder // 1000:06d}"
+
+
+def _headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Copy headers with interned names, so repeated names share one string"""
+    return {_intern(k): v for k, v in headers.items()}
+
+
+def _har_headers(headers: Dict[str, str]) -> List[Dict[str, str]]:
+    """Headers as a HAR name/value list"""
+    return [{"name": _intern(k), "value": v} for k, v in headers.items()]
+
+
 class NetworkInspector:
     """Track and log all network requests"""
     
-    def __init__(self):
-        self.requests: List[Dict] = []
-        self.responses: List[Dict] = []
+    LOG_BATCH_SIZE = 100
+    LOG_BATCH_WINDOW = 0.1  # seconds
+    
+    def __init__(self, max_entries: int = 10_000):
+        # Bounded: oldest events are evicted once max_entries is reached
+        self.requests: Deque[Dict] = deque(maxlen=max_entries)
+        self.responses: Deque[Dict] = deque(maxlen=max_entries)
         self.enabled = True
+        
+        # Debug lines are batched into one log record per window
+        self._pending_log: List[str] = []
+        self._log_timer: Optional[asyncio.TimerHandle] = None
     
     def log_request(self, request):
         """Log outgoing request"""
@@ -67,14 +149,15 @@ class NetworkInspector:
             return
         
         req_data = {
-            "timestamp": datetime.now().isoformat(),
+            "ts_ns": time.time_ns(),
             "method": request.method,
             "url": request.url,
-            "headers": dict(request.headers),
-            "resource_type": request.resource_type
+            "resource_type": request.resource_type,
+            "_source": request  # headers are read lazily on export
         }
         self.requests.append(req_data)
-        logger.debug(f"→ {request.method} {request.url}")
+        if logger.isEnabledFor(logging.DEBUG):
+            self._queue_log(f"→ {request.method} {request.url}")
     
     def log_response(self, response):
         """Log incoming response"""
@@ -82,16 +165,40 @@ class NetworkInspector:
             return
         
         resp_data = {
-            "timestamp": datetime.now().isoformat(),
+            "ts_ns": time.time_ns(),
             "url": response.url,
             "status": response.status,
-            "headers": dict(response.headers),
-            "ok": response.ok
+            "ok": response.ok,
+            "_source": response  # headers are read lazily on export
         }
         self.responses.append(resp_data)
         
-        status_icon = "✅" if response.ok else "❌"
-        logger.debug(f"← {status_icon} {response.status} {response.url}")
+        if logger.isEnabledFor(logging.DEBUG):
+            status_icon = "✅" if response.ok else "❌"
+            self._queue_log(f"← {status_icon} {response.status} {response.url}")
+    
+    def _queue_log(self, line: str):
+        """Queue a debug line; flushed every LOG_BATCH_SIZE lines or LOG_BATCH_WINDOW seconds"""
+        self._pending_log.append(line)
+        
+        if len(self._pending_log) >= self.LOG_BATCH_SIZE:
+            self._flush_logs()
+        elif self._log_timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._flush_logs()
+                return
+            self._log_timer = loop.call_later(self.LOG_BATCH_WINDOW, self._flush_logs)
+    
+    def _flush_logs(self):
+        """Emit all queued debug lines as a single record"""
+        if self._log_timer is not None:
+            self._log_timer.cancel()
+            self._log_timer = None
+        if self._pending_log:
+            logger.debug("\n".join(self._pending_log))
+            self._pending_log.clear()
     
     def get_summary(self) -> Dict:
         """Get network activity summary"""
@@ -99,10 +206,23 @@ class NetworkInspector:
             "total_requests": len(self.requests),
             "total_responses": len(self.responses),
             "failed_requests": len([r for r in self.responses if not r.get("ok", True)]),
-            "requests": self.requests[-10:],  # Last 10
-            "responses": self.responses[-10:]  # Last 10
+            "requests": [self._public(r) for r in self._tail(self.requests, 10)],  # Last 10
+            "responses": [self._public(r) for r in self._tail(self.responses, 10)]  # Last 10
         }
     
+    @staticmethod
+    def _public(event: Dict) -> Dict:
+        """Event as a plain dict, with headers materialized from the Playwright object"""
+        data = {k: v for k, v in event.items() if k not in ("_source", "ts_ns")}
+        data["timestamp"] = format_timestamp_ns(event["ts_ns"])
+        data["headers"] = _headers(event["_source"].headers)
+        return data
+    
+    @staticmethod
+    def _tail(events: Deque[Dict], count: int) -> List[Dict]:
+        """Last `count` events without copying the whole deque"""
+        return list(islice(events, max(0, len(events) - count), None))
+    
     def clear(self):
         """Clear all logged requests/responses"""
         self.requests.clear()
@@ -110,35 +230,38 @@ class NetworkInspector:
         logger.info("Network inspector cleared")
     
     def export_har(self, filename: str = "network.har"):
-        """Export network activity as HAR file"""
-        har_data = {
-            "log": {
-                "version": "1.2",
-                "creator": {"name": "Enhanced Browser MCP", "version": "2.0"},
-                "entries": []
-            }
-        }
+        """Export network activity as HAR file (entries are streamed, not built in memory)"""
+        filepath = f"/app/logs/{filename}"
+        creator = {"name": "Enhanced Browser MCP", "version": "2.0"}
         
-        for req, resp in zip(self.requests, self.responses):
-            entry = {
-                "startedDateTime": req["timestamp"],
-                "request": {
-                    "method": req["method"],
-                    "url": req["url"],
-                    "headers": [{"name": k, "value": v} for k, v in req["headers"].items()]
-                },
-                "response": {
-                    "status": resp["status"],
-                    "headers": [{"name": k, "value": v} for k, v in resp["headers"].items()]
+        with open(filepath, 'wb', buffering=1 << 16) as f:
+            f.write(b'{"log":{"version":"1.2","creator":%s,"entries":[' % _dumps(creator))
+            
+            # Pair each response with the request that produced it; requests still
+            # pending (or failed) get status 0, as browsers do in their HAR exports
+            responses = {id(r["_source"].request): r for r in self.responses}
+            
+            for i, req in enumerate(self.requests):
+                resp = responses.get(id(req["_source"]))
+                entry = {
+                    "startedDateTime": format_timestamp_ns(req["ts_ns"]),
+                    "request": {
+                        "method": req["method"],
+                        "url": req["url"],
+                        "headers": _har_headers(req["_source"].headers)
+                    },
+                    "response": {
+                        "status": resp["status"] if resp else 0,
+                        "headers": _har_headers(resp["_source"].headers) if resp else []
+                    }
                 }
-            }
-            har_data["log"]["entries"].append(entry)
-        
-        filepath = f"/app/logs/{filename}"
-        with open(filepath, 'w') as f:
-            json.dump(har_data, f, indent=2)
+                if i:
+                    f.write(b',')
+                f.write(_dumps(entry))
+            
+            f.write(b']}}')
         
-        logger.info(f"HAR file exported: {filepath}")
+        logger.info("HAR file exported: %s", filepath)
         return filepath
 
 
@@ -149,56 +272,91 @@ class NetworkInspector:
 class SessionManager:
     """Save and restore browser sessions"""
     
+    # Compact gzipped Playwright storage state; {name}.json is a small metadata sidecar
+    STORAGE_STATE_SUFFIX = ".state.json.gz"
+    
     def __init__(self, session_dir: str = "/app/sessions"):
         self.session_dir = session_dir
         os.makedirs(session_dir, exist_ok=True)
+        # path -> ((mtime_ns, size), parsed metadata); unchanged sidecars are not re-read
+        self._meta_cache: Dict[str, tuple] = {}
+    
+    def get_storage_state_path(self, name: str = "default") -> str:
+        """Path of the native Playwright storage state for a session"""
+        return os.path.join(self.session_dir, f"{name}{self.STORAGE_STATE_SUFFIX}")
+    
+    @staticmethod
+    def _read(path: str, compressed: bool = False) -> bytes:
+        """Blocking read, run via asyncio.to_thread"""
+        with (gzip.open if compressed else open)(path, 'rb') as f:
+            return f.read()
+    
+    @staticmethod
+    def _write(path: str, data: bytes, compressed: bool = False):
+        """Blocking write, run via asyncio.to_thread"""
+        with (gzip.open if compressed else open)(path, 'wb') as f:
+            f.write(data)
+    
+    async def load_storage_state(self, name: str = "default") -> Optional[Dict]:
+        """Read a saved storage state (cookies + localStorage), if any"""
+        try:
+            data = await asyncio.to_thread(self._read, self.get_storage_state_path(name), True)
+        except FileNotFoundError:
+            return None
+        return _loads(data)
     
     async def save_session(self, context: BrowserContext, name: str = "default", current_url: str = None) -> str:
         """Save browser session (cookies, storage)"""
         session_path = os.path.join(self.session_dir, f"{name}.json")
         
-        # Get cookies
-        cookies = await context.cookies()
+        # Native storage state (cookies + localStorage) for new_context(storage_state=...)
+        state = await context.storage_state()
+        cookies = state.get("cookies", [])
+        
+        # File I/O (and gzip) runs off the event loop so network handlers keep up
+        await asyncio.to_thread(self._write, self.get_storage_state_path(name), _dumps(state), True)
         
         # Get cookie domains for info
         domains = list(set([c.get('domain', 'unknown') for c in cookies]))
         
-        # Save session data
+        # Save session metadata
         session_data = {
             "saved_at": datetime.now().isoformat(),
-            "cookies": cookies,
             "cookie_count": len(cookies),
             "domains": domains,
             "current_url": current_url,
             "name": name
         }
         
-        with open(session_path, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        await asyncio.to_thread(self._write, session_path, _dumps(session_data, indent=True))
         
-        logger.info(f"Session saved: {name} ({len(cookies)} cookies from {len(domains)} domains)")
+        logger.info("Session saved: %s (%s cookies from %s domains)", name, len(cookies), len(domains))
         return session_path
     
-    async def load_session(self, context: BrowserContext, name: str = "default") -> Dict:
-        """Load browser session"""
+    async def load_session(self, context: BrowserContext, name: str = "default", restore_cookies: bool = True) -> Dict:
+        """Load browser session (set restore_cookies=False if the context was built from storage state)"""
         session_path = os.path.join(self.session_dir, f"{name}.json")
         
-        if not os.path.exists(session_path):
-            logger.warning(f"Session not found: {name}")
+        try:
+            raw = await asyncio.to_thread(self._read, session_path)
+        except FileNotFoundError:
+            logger.warning("Session not found: %s", name)
             return {"success": False, "error": "Session not found"}
         
         try:
-            with open(session_path, 'r') as f:
-                session_data = json.load(f)
+            session_data = _loads(raw)
             
-            # Restore cookies
-            await context.add_cookies(session_data["cookies"])
+            # Restore cookies (older sessions keep them inline in the metadata file)
+            if restore_cookies:
+                state = await self.load_storage_state(name)
+                cookies = state.get("cookies", []) if state else session_data.get("cookies", [])
+                await context.add_cookies(cookies)
             
-            cookie_count = len(session_data['cookies'])
+            cookie_count = session_data.get('cookie_count', len(session_data.get('cookies', [])))
             domains = session_data.get('domains', [])
             saved_url = session_data.get('current_url')
             
-            logger.info(f"Session loaded: {name} ({cookie_count} cookies from {len(domains)} domains)")
+            logger.info("Session loaded: %s (%s cookies from %s domains)", name, cookie_count, len(domains))
             
             return {
                 "success": True,
@@ -208,25 +366,60 @@ class SessionManager:
                 "saved_at": session_data.get('saved_at')
             }
         except Exception as e:
-            logger.error(f"Failed to load session: {e}")
+            logger.error("Failed to load session: %s", e)
             return {"success": False, "error": str(e)}
     
     def list_sessions(self) -> List[str]:
         """List all saved sessions"""
+        with os.scandir(self.session_dir) as entries:
+            return [
+                entry.name[:-5]  # Remove .json
+                for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            ]
+    
+    def list_sessions_detailed(self) -> List[Dict]:
+        """List all saved sessions with their metadata in one directory pass"""
         sessions = []
-        for filename in os.listdir(self.session_dir):
-            if filename.endswith('.json'):
-                sessions.append(filename[:-5])  # Remove .json
+        cache = {}
+        with os.scandir(self.session_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                name = entry.name[:-5]  # Remove .json
+                try:
+                    st = entry.stat()
+                    key = (st.st_mtime_ns, st.st_size)
+                    cached = self._meta_cache.get(entry.path)
+                    if cached is not None and cached[0] == key:
+                        data = cached[1]
+                    else:
+                        with open(entry.path, 'rb') as f:
+                            data = _loads(f.read())
+                        data.pop("cookies", None)  # inline cookies in older sessions
+                        data["name"] = name
+                    cache[entry.path] = (key, data)
+                    sessions.append(dict(data))
+                except Exception:
+                    sessions.append({"name": name})
+        self._meta_cache = cache  # drops entries for deleted sessions
         return sessions
     
     def delete_session(self, name: str) -> bool:
         """Delete a session"""
         session_path = os.path.join(self.session_dir, f"{name}.json")
-        if os.path.exists(session_path):
+        try:
             os.remove(session_path)
-            logger.info(f"Session deleted: {name}")
-            return True
-        return False
+        except FileNotFoundError:
+            return False
+        
+        try:
+            os.remove(self.get_storage_state_path(name))
+        except FileNotFoundError:
+            pass
+        
+        logger.info("Session deleted: %s", name)
+        return True
 
 
 # ============================================================================
@@ -250,78 +443,105 @@ class SmartSelector:
         "form": ["form"],
     }
     
+    # One CSS union per keyword: a single query_selector instead of one per pattern
+    _UNIONS = {keyword: ", ".join(selectors) for keyword, selectors in COMMON_SELECTORS.items()}
+    
+    # Shapes that never occur in link/button text: attribute selectors with a value
+    # ([type='submit']) and >> selector chains. Punctuation such as . : = # is common
+    # in visible text ("Dr. Smith", "Note: ...", "v2.0"), so it doesn't count.
+    _SELECTOR_SHAPED = re.compile(r"\[[\w-]+\s*[~|^$*]?=|>>")
+    
     @staticmethod
     async def find_element(page: Page, keyword: str) -> Optional[str]:
         """Find element using smart keyword matching"""
         
         # Check common patterns
-        if keyword in SmartSelector.COMMON_SELECTORS:
-            for selector in SmartSelector.COMMON_SELECTORS[keyword]:
-                try:
-                    element = await page.query_selector(selector)
-                    if element:
-                        logger.info(f"Found '{keyword}' using selector: {selector}")
-                        return selector
-                except:
-                    continue
+        selector = SmartSelector._UNIONS.get(keyword)
+        if selector:
+            try:
+                element = await page.query_selector(selector)
+                if element:
+                    logger.info("Found '%s' using selector: %s", keyword, selector)
+                    return selector
+            except:
+                pass
         
-        # Try text matching
+        # Selector syntax can't be visible text, so a text= match would only cost a round-trip
+        if SmartSelector._SELECTOR_SHAPED.search(keyword):
+            return None
+        
+        return await SmartSelector.find_by_text(page, keyword)
+    
+    @staticmethod
+    async def find_by_text(page: Page, keyword: str) -> Optional[str]:
+        """Find element whose visible text matches keyword"""
         try:
             selector = f"text={keyword}"
             element = await page.query_selector(selector)
             if element:
-                logger.info(f"Found element with text: {keyword}")
+                logger.info("Found element with text: %s", keyword)
                 return selector
         except:
             pass
         
         return None
     
+    # Extract suggestions in one evaluate_all round-trip (limit to 10 elements). Matching
+    # goes through the locator, so Playwright selectors (text=, :has-text(), >>) still work
+    _SUGGEST_JS = """(elements) => elements.slice(0, 10).map((e, i) => {
+        const text = (e.innerText || '').trim().slice(0, 50);
+        const cls = (e.getAttribute('class') || '').trim().split(/\\s+/)[0];
+        return {
+            index: i,
+            text: text || null,
+            id: e.id ? '#' + e.id : null,
+            class: cls ? '.' + cls : null
+        };
+    })"""
+    
     @staticmethod
-    async def suggest_selectors(page: Page, element_type: str = "button") -> List[str]:
+    async def suggest_selectors(page: Page, element_type: str = "button") -> List[Dict]:
         """Suggest available selectors for element type"""
-        suggestions = []
-        
-        # Get all elements of type
-        elements = await page.query_selector_all(element_type)
-        
-        for i, elem in enumerate(elements[:10]):  # Limit to 10
-            try:
-                # Get text content
-                text = await elem.inner_text()
-                # Get attributes
-                id_attr = await elem.get_attribute("id")
-                class_attr = await elem.get_attribute("class")
-                
-                suggestion = {
-                    "index": i,
-                    "text": text.strip()[:50] if text else None,
-                    "id": f"#{id_attr}" if id_attr else None,
-                    "class": f".{class_attr.split()[0]}" if class_attr else None
-                }
-                suggestions.append(suggestion)
-            except:
-                continue
-        
-        return suggestions
+        return await page.locator(element_type).evaluate_all(SmartSelector._SUGGEST_JS)
 
 
 # ============================================================================
 # ENHANCED BROWSER
 # ============================================================================
 
+def _needs_page(fn):
+    """Return an error dict when no page is loaded, and turn exceptions into error dicts"""
+    @wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        if not self.page:
+            return {"success": False, "error": "No page loaded"}
+        try:
+            return await fn(self, *args, **kwargs)
+        except Exception as e:
+            logger.error("%s failed: %s", fn.__name__, e)
+            return {"success": False, "error": str(e)}
+    return wrapper
+
+
 class EnhancedBrowser:
     """Complete browser automation with all enhancements"""
     
-    def __init__(self, proxy: Optional[str] = None, headless: bool = True):
+    CONTEXT_OPTIONS = {
+        "ignore_https_errors": True,
+        "user_agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+        "viewport": {'width': 1920, 'height': 1080}
+    }
+    
+    def __init__(self, proxy: Optional[str] = None, headless: bool = True, persistent_profile: Optional[str] = None):
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
-        self.screenshot_dir = "/app/screenshots"
+        self.screenshot_dir = SCREENSHOT_DIR
         self.download_dir = "/app/downloads"
         self.proxy = proxy
         self.headless = headless
+        self.persistent_profile = persistent_profile
         
         # Enhanced features
         self.network_inspector = NetworkInspector()
@@ -330,8 +550,20 @@ class EnhancedBrowser:
         
         logger.info("Enhanced browser initialized")
     
+    async def __aenter__(self):
+        """Context manager entry - keep one Playwright/Browser alive for the block"""
+        await self.initialize()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        await self.cleanup()
+    
     async def initialize(self):
         """Initialize Playwright browser with all features"""
+        if self.playwright is not None:
+            return
+        
         self.playwright = await async_playwright().start()
         
         # Browser args
@@ -345,19 +577,34 @@ class EnhancedBrowser:
         # Add proxy if specified
         if self.proxy:
             args.append(f'--proxy-server={self.proxy}')
-            logger.info(f"Using proxy: {self.proxy}")
-        
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=args
-        )
-        
-        # Create context
-        context_options = {
-            "ignore_https_errors": True,
-            "user_agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            "viewport": {'width': 1920, 'height': 1080}
-        }
+            logger.info("Using proxy: %s", self.proxy)
+        
+        # Persistent profile: Chromium keeps cookies/localStorage in user_data_dir
+        if self.persistent_profile:
+            os.makedirs(self.persistent_profile, exist_ok=True)
+            self.context = await self.playwright.chromium.launch_persistent_context(
+                self.persistent_profile,
+                headless=self.headless,
+                args=args,
+                **self.CONTEXT_OPTIONS
+            )
+            self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+            self._attach_network_inspector()
+            logger.info("Using persistent profile: %s", self.persistent_profile)
+        else:
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=args
+            )
+            await self._create_context()
+        
+        logger.info("✅ Enhanced browser ready (SSL verification disabled)")
+    
+    async def _create_context(self, storage_state: Optional[Dict] = None):
+        """Create a fresh context + page, optionally restored from a storage state"""
+        context_options = dict(self.CONTEXT_OPTIONS)
+        if storage_state:
+            context_options["storage_state"] = storage_state
         
         if self.proxy:
             # Proxy auth can be added here if needed
@@ -365,12 +612,12 @@ class EnhancedBrowser:
         
         self.context = await self.browser.new_context(**context_options)
         self.page = await self.context.new_page()
-        
-        # Setup network monitoring
+        self._attach_network_inspector()
+    
+    def _attach_network_inspector(self):
+        """Setup network monitoring on the current page"""
         self.page.on("request", self.network_inspector.log_request)
         self.page.on("response", self.network_inspector.log_response)
-        
-        logger.info("✅ Enhanced browser ready (SSL verification disabled)")
     
     async def navigate(self, url: str, timeout: int = 30000) -> dict:
         """Navigate to URL with enhanced logging"""
@@ -378,13 +625,13 @@ class EnhancedBrowser:
             await self.initialize()
         
         try:
-            logger.info(f"🌐 Navigating to: {url}")
+            logger.info("🌐 Navigating to: %s", url)
             response = await self.page.goto(url, wait_until='domcontentloaded', timeout=timeout)
             
             title = await self.page.title()
             url_final = self.page.url
             
-            logger.info(f"✅ Loaded: {title}")
+            logger.info("✅ Loaded: %s", title)
             
             return {
                 "success": True,
@@ -393,65 +640,64 @@ class EnhancedBrowser:
                 "status": response.status if response else None
             }
         except Exception as e:
-            logger.error(f"Navigation failed: {e}")
+            logger.error("Navigation failed: %s", e)
             return {"success": False, "error": str(e)}
     
+    @_needs_page
     async def smart_click(self, selector_or_keyword: str) -> dict:
         """Click using smart selector or keyword"""
-        if not self.page:
-            return {"success": False, "error": "No page loaded"}
-        
-        # Try as regular selector first
-        try:
-            await self.page.click(selector_or_keyword, timeout=10000)
-            logger.info(f"✅ Clicked: {selector_or_keyword}")
-            return {"success": True, "message": f"✅ Clicked: {selector_or_keyword}"}
-        except:
-            pass
+        # Known keywords: click the precompiled union selector directly (one round-trip)
+        union = SmartSelector._UNIONS.get(selector_or_keyword)
+        if union:
+            try:
+                await self.page.click(union, timeout=10000)
+                logger.info("✅ Clicked using smart selector: %s", union)
+                return {"success": True, "message": f"✅ Clicked: {selector_or_keyword} (using {union})"}
+            except Exception as e:
+                # The union was the whole pattern list; what's left is matching the text
+                logger.warning("Smart selector failed, trying text match: %s", e)
+            smart_selector = await self.smart_selector.find_by_text(self.page, selector_or_keyword)
+        else:
+            # Try as regular selector first
+            try:
+                await self.page.click(selector_or_keyword, timeout=10000)
+                logger.info("✅ Clicked: %s", selector_or_keyword)
+                return {"success": True, "message": f"✅ Clicked: {selector_or_keyword}"}
+            except:
+                pass
+            
+            # Try smart selector
+            smart_selector = await self.smart_selector.find_element(self.page, selector_or_keyword)
         
-        # Try smart selector
-        smart_selector = await self.smart_selector.find_element(self.page, selector_or_keyword)
         if smart_selector:
             try:
                 await self.page.click(smart_selector, timeout=10000)
-                logger.info(f"✅ Clicked using smart selector: {smart_selector}")
+                logger.info("✅ Clicked using smart selector: %s", smart_selector)
                 return {"success": True, "message": f"✅ Clicked: {selector_or_keyword} (using {smart_selector})"}
             except Exception as e:
-                logger.error(f"Smart click failed: {e}")
+                logger.error("Smart click failed: %s", e)
                 return {"success": False, "error": str(e)}
         
         return {"success": False, "error": f"Element not found: {selector_or_keyword}"}
     
+    @_needs_page
     async def fill(self, selector: str, value: str) -> dict:
         """Fill input field with logging"""
-        if not self.page:
-            return {"success": False, "error": "No page loaded"}
-        
-        try:
-            await self.page.fill(selector, value, timeout=10000)
-            logger.info(f"✅ Filled: {selector}")
-            return {"success": True, "message": f"✅ Filled: {selector}"}
-        except Exception as e:
-            logger.error(f"Fill failed: {e}")
-            return {"success": False, "error": str(e)}
+        await self.page.fill(selector, value, timeout=10000)
+        logger.info("✅ Filled: %s", selector)
+        return {"success": True, "message": f"✅ Filled: {selector}"}
     
+    @_needs_page
     async def screenshot(self, filename: str = "screenshot.png", full_page: bool = True) -> dict:
         """Take screenshot with annotation support"""
-        if not self.page:
-            return {"success": False, "error": "No page loaded"}
+        if not filename.startswith('/'):
+            filepath = os.path.join(self.screenshot_dir, filename)
+        else:
+            filepath = filename
         
-        try:
-            if not filename.startswith('/'):
-                filepath = os.path.join(self.screenshot_dir, filename)
-            else:
-                filepath = filename
-            
-            await self.page.screenshot(path=filepath, full_page=full_page)
-            logger.info(f"📸 Screenshot saved: {filename}")
-            return {"success": True, "message": f"✅ Screenshot saved: screenshots/{filename}"}
-        except Exception as e:
-            logger.error(f"Screenshot failed: {e}")
-            return {"success": False, "error": str(e)}
+        await self.page.screenshot(path=filepath, full_page=full_page)
+        logger.info("📸 Screenshot saved: %s", filename)
+        return {"success": True, "message": f"✅ Screenshot saved: screenshots/{filename}"}
     
     async def get_network_summary(self) -> dict:
         """Get network activity summary"""
@@ -478,7 +724,7 @@ class EnhancedBrowser:
             path = await self.session_manager.save_session(self.context, name, current_url)
             return {"success": True, "path": path, "message": f"✅ Session saved: {name}"}
         except Exception as e:
-            logger.error(f"Save session failed: {e}")
+            logger.error("Save session failed: %s", e)
             return {"success": False, "error": str(e)}
     
     async def load_session(self, name: str = "default", auto_navigate: bool = False) -> dict:
@@ -488,7 +734,17 @@ class EnhancedBrowser:
             if not self.context:
                 await self.initialize()
             
-            result = await self.session_manager.load_session(self.context, name)
+            # Rebuild the context from native storage state when available;
+            # persistent profiles already hold their state, so fall back to cookies
+            state = await self.session_manager.load_storage_state(name) if self.browser else None
+            if state is not None:
+                await self.page.close()
+                await self.context.close()
+                await self._create_context(storage_state=state)
+            
+            result = await self.session_manager.load_session(
+                self.context, name, restore_cookies=state is None
+            )
             
             if result["success"]:
                 # Build detailed message
@@ -511,7 +767,7 @@ class EnhancedBrowser:
                     
                     # Auto-navigate if requested
                     if auto_navigate and saved_url:
-                        logger.info(f"Auto-navigating to: {saved_url}")
+                        logger.info("Auto-navigating to: %s", saved_url)
                         nav_result = await self.navigate(saved_url)
                         if nav_result["success"]:
                             message += f"\n   ✅ Auto-navigated to {saved_url}"
@@ -522,16 +778,14 @@ class EnhancedBrowser:
             else:
                 return result
         except Exception as e:
-            logger.error(f"Load session failed: {e}")
+            logger.error("Load session failed: %s", e)
             return {"success": False, "error": str(e)}
     
+    @_needs_page
     async def suggest_selectors(self, element_type: str = "button") -> dict:
         """Get selector suggestions for elements"""
-        try:
-            suggestions = await self.smart_selector.suggest_selectors(self.page, element_type)
-            return {"success": True, "suggestions": suggestions}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        suggestions = await self.smart_selector.suggest_selectors(self.page, element_type)
+        return {"success": True, "suggestions": suggestions}
     
     async def cleanup(self):
         """Close browser and save logs"""
@@ -543,7 +797,15 @@ class EnhancedBrowser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
+        self.page = None
+        self.context = None
+        self.browser = None
+        self.playwright = None
+        # Emit the batched request/response lines (and cancel their pending timer)
+        # before the MemoryHandler flush, so none are lost when the loop shuts down
+        self.network_inspector._flush_logs()
         logger.info("🧹 Browser cleaned up")
+        flush_browser_logs()
 
 
 # ============================================================================
@@ -552,8 +814,6 @@ class EnhancedBrowser:
 
 async def main():
     """Enhanced CLI Interface"""
-    browser = EnhancedBrowser()
-    
     print("="*70)
     print("🚀 ENHANCED FULL-FEATURED UNSAFE BROWSER")
     print("⚠️  WARNING: SSL Certificate Verification DISABLED")
@@ -580,147 +840,144 @@ async def main():
     print("  quit                    - Exit")
     print("="*70)
     
-    try:
-        while True:
-            command = input("\n> ").strip().split(maxsplit=2)
-            
-            if not command:
-                continue
-            
-            action = command[0].lower()
-            
-            if action in ["quit", "exit"]:
-                break
-            
-            elif action == "nav" or action == "navigate":
-                if len(command) < 2:
-                    print("❌ Usage: nav <url>")
-                    continue
-                result = await browser.navigate(command[1])
-                if result["success"]:
-                    print(f"✅ {result['title']} ({result['status']})")
-                else:
-                    print(f"❌ {result['error']}")
-            
-            elif action == "click":
-                if len(command) < 2:
-                    print("❌ Usage: click <selector>")
-                    continue
-                result = await browser.smart_click(command[1])
-                print(result.get("message") or f"❌ {result.get('error')}")
-            
-            elif action == "fill":
-                if len(command) < 3:
-                    print("❌ Usage: fill <selector> <text>")
+    async with EnhancedBrowser() as browser:
+        try:
+            while True:
+                command = input("\n> ").strip().split(maxsplit=2)
+                
+                if not command:
                     continue
-                result = await browser.fill(command[1], command[2])
-                print(result.get("message") or f"❌ {result.get('error')}")
-            
-            elif action == "screenshot":
-                filename = command[1] if len(command) > 1 else "screenshot.png"
-                result = await browser.screenshot(filename)
-                print(result.get("message") or f"❌ {result.get('error')}")
-            
-            elif action == "suggest":
-                elem_type = command[1] if len(command) > 1 else "button"
-                result = await browser.suggest_selectors(elem_type)
-                if result["success"]:
-                    print(f"\n🔍 Found {len(result['suggestions'])} {elem_type} elements:")
-                    for s in result['suggestions']:
-                        print(f"  [{s['index']}] Text: {s.get('text', 'N/A')}")
-                        if s.get('id'):
-                            print(f"       ID: {s['id']}")
-                        if s.get('class'):
-                            print(f"       Class: {s['class']}")
-                else:
-                    print(f"❌ {result['error']}")
-            
-            elif action == "network":
-                summary = await browser.get_network_summary()
-                print(f"\n📊 Network Summary:")
-                print(f"  Total Requests: {summary['total_requests']}")
-                print(f"  Total Responses: {summary['total_responses']}")
-                print(f"  Failed: {summary['failed_requests']}")
-                print(f"\n  Recent requests:")
-                for req in summary['requests'][-5:]:
-                    print(f"    → {req['method']} {req['url']}")
-            
-            elif action == "export-har":
-                filename = command[1] if len(command) > 1 else "network.har"
-                result = await browser.export_network_har(filename)
-                if result["success"]:
-                    print(f"✅ HAR exported: {result['path']}")
-                else:
-                    print(f"❌ {result['error']}")
-            
-            elif action == "save-session":
-                name = command[1] if len(command) > 1 else "default"
-                result = await browser.save_session(name)
-                print(result.get("message") or f"❌ {result.get('error')}")
-            
-            elif action == "load-session":
-                parts = command[1].split() if len(command) > 1 else []
-                name = parts[0] if parts else "default"
-                auto_nav = "--nav" in parts or "-n" in parts
                 
-                result = await browser.load_session(name, auto_navigate=auto_nav)
-                print(result.get("message") or f"❌ {result.get('error')}")
-            
-            elif action == "list-sessions":
-                sessions = browser.session_manager.list_sessions()
-                if sessions:
-                    print(f"\n💾 Saved sessions ({len(sessions)}):")
-                    for s in sessions:
-                        # Try to load session info
-                        try:
-                            session_path = f"/app/sessions/{s}.json"
-                            with open(session_path, 'r') as f:
-                                data = json.load(f)
-                            cookie_count = data.get('cookie_count', 0)
-                            saved_url = data.get('current_url', 'N/A')
-                            print(f"  - {s} ({cookie_count} cookies) - {saved_url}")
-                        except:
-                            print(f"  - {s}")
-                else:
-                    print("No saved sessions")
-            
-            elif action == "session-info":
-                name = command[1] if len(command) > 1 else "default"
-                try:
-                    session_path = f"/app/sessions/{name}.json"
-                    with open(session_path, 'r') as f:
-                        data = json.load(f)
+                action = command[0].lower()
+                
+                if action in ["quit", "exit"]:
+                    break
+                
+                elif action == "nav" or action == "navigate":
+                    if len(command) < 2:
+                        print("❌ Usage: nav <url>")
+                        continue
+                    result = await browser.navigate(command[1])
+                    if result["success"]:
+                        print(f"✅ {result['title']} ({result['status']})")
+                    else:
+                        print(f"❌ {result['error']}")
+                
+                elif action == "click":
+                    if len(command) < 2:
+                        print("❌ Usage: click <selector>")
+                        continue
+                    result = await browser.smart_click(command[1])
+                    print(result.get("message") or f"❌ {result.get('error')}")
+                
+                elif action == "fill":
+                    if len(command) < 3:
+                        print("❌ Usage: fill <selector> <text>")
+                        continue
+                    result = await browser.fill(command[1], command[2])
+                    print(result.get("message") or f"❌ {result.get('error')}")
+                
+                elif action == "screenshot":
+                    filename = command[1] if len(command) > 1 else "screenshot.png"
+                    result = await browser.screenshot(filename)
+                    print(result.get("message") or f"❌ {result.get('error')}")
+                
+                elif action == "suggest":
+                    elem_type = command[1] if len(command) > 1 else "button"
+                    result = await browser.suggest_selectors(elem_type)
+                    if result["success"]:
+                        print(f"\n🔍 Found {len(result['suggestions'])} {elem_type} elements:")
+                        for s in result['suggestions']:
+                            print(f"  [{s['index']}] Text: {s.get('text', 'N/A')}")
+                            if s.get('id'):
+                                print(f"       ID: {s['id']}")
+                            if s.get('class'):
+                                print(f"       Class: {s['class']}")
+                    else:
+                        print(f"❌ {result['error']}")
+                
+                elif action == "network":
+                    summary = await browser.get_network_summary()
+                    print(f"\n📊 Network Summary:")
+                    print(f"  Total Requests: {summary['total_requests']}")
+                    print(f"  Total Responses: {summary['total_responses']}")
+                    print(f"  Failed: {summary['failed_requests']}")
+                    print(f"\n  Recent requests:")
+                    for req in summary['requests'][-5:]:
+                        print(f"    → {req['method']} {req['url']}")
+                
+                elif action == "export-har":
+                    filename = command[1] if len(command) > 1 else "network.har"
+                    result = await browser.export_network_har(filename)
+                    if result["success"]:
+                        print(f"✅ HAR exported: {result['path']}")
+                    else:
+                        print(f"❌ {result['error']}")
+                
+                elif action == "save-session":
+                    name = command[1] if len(command) > 1 else "default"
+                    result = await browser.save_session(name)
+                    print(result.get("message") or f"❌ {result.get('error')}")
+                
+                elif action == "load-session":
+                    parts = command[1].split() if len(command) > 1 else []
+                    name = parts[0] if parts else "default"
+                    auto_nav = "--nav" in parts or "-n" in parts
                     
-                    print(f"\n📊 Session Info: {name}")
-                    print(f"  Saved at: {data.get('saved_at', 'N/A')}")
-                    print(f"  Cookies: {data.get('cookie_count', 0)}")
-                    print(f"  Domains: {', '.join(data.get('domains', []))}")
-                    print(f"  URL: {data.get('current_url', 'N/A')}")
-                except FileNotFoundError:
-                    print(f"❌ Session not found: {name}")
-                except Exception as e:
-                    print(f"❌ Error: {e}")
-            
-            elif action == "logs":
-                print("\n📋 Recent logs:")
-                try:
-                    with open("/app/logs/browser.log", "r") as f:
-                        lines = f.readlines()
-                        for line in lines[-15:]:
-                            print(line.strip())
-                except:
-                    print("No logs yet")
-            
-            elif action == "help":
-                print("\nSee commands above ⬆️")
-            
-            else:
-                print(f"❌ Unknown command: {action}")
-    
-    except KeyboardInterrupt:
-        print("\n\nExiting...")
-    finally:
-        await browser.cleanup()
+                    result = await browser.load_session(name, auto_navigate=auto_nav)
+                    print(result.get("message") or f"❌ {result.get('error')}")
+                
+                elif action == "list-sessions":
+                    sessions = browser.session_manager.list_sessions_detailed()
+                    if sessions:
+                        print(f"\n💾 Saved sessions ({len(sessions)}):")
+                        for s in sessions:
+                            # Unreadable metadata leaves only the name
+                            if len(s) > 1:
+                                cookie_count = s.get('cookie_count', 0)
+                                saved_url = s.get('current_url', 'N/A')
+                                print(f"  - {s['name']} ({cookie_count} cookies) - {saved_url}")
+                            else:
+                                print(f"  - {s['name']}")
+                    else:
+                        print("No saved sessions")
+                
+                elif action == "session-info":
+                    name = command[1] if len(command) > 1 else "default"
+                    try:
+                        session_path = f"/app/sessions/{name}.json"
+                        with open(session_path, 'rb') as f:
+                            data = _loads(f.read())
+                        
+                        print(f"\n📊 Session Info: {name}")
+                        print(f"  Saved at: {data.get('saved_at', 'N/A')}")
+                        print(f"  Cookies: {data.get('cookie_count', 0)}")
+                        print(f"  Domains: {', '.join(data.get('domains', []))}")
+                        print(f"  URL: {data.get('current_url', 'N/A')}")
+                    except FileNotFoundError:
+                        print(f"❌ Session not found: {name}")
+                    except Exception as e:
+                        print(f"❌ Error: {e}")
+                
+                elif action == "logs":
+                    print("\n📋 Recent logs:")
+                    flush_browser_logs()
+                    try:
+                        with open("/app/logs/browser.log", "r") as f:
+                            lines = f.readlines()
+                            for line in lines[-15:]:
+                                print(line.strip())
+                    except:
+                        print("No logs yet")
+                
+                elif action == "help":
+                    print("\nSee commands above ⬆️")
+                
+                else:
+                    print(f"❌ Unknown command: {action}")
+        
+        except KeyboardInterrupt:
+            print("\n\nExiting...")
 
 
 if __name__ == "__main__":
@@ -8,12 +8,36 @@ import asyncio
 import aiohttp
 import ssl
 import json
+import codecs
+import copy
 import os
+import sys
 import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from enum import Enum
 import time
+import random
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+try:
+    import aiodns  # noqa: F401 - enables aiohttp.AsyncResolver
+    HAS_AIODNS = True
+except ImportError:  # fall back to aiohttp's threaded getaddrinfo resolver
+    HAS_AIODNS = False
+
+try:
+    import brotli  # noqa: F401 - lets aiohttp decode Content-Encoding: br
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
 
 # ============================================================================
 # CUSTOM ERROR TYPES
@@ -62,28 +86,66 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wrapped = {level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()}
+    
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.RESET)
-        record.levelname = f"{log_color}{record.levelname}{self.RESET}"
-        return super().format(record)
+        # Records are shared between handlers, so restore the plain levelname afterwards
+        levelname = record.levelname
+        record.levelname = self._wrapped.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
-def setup_logging(log_file: str = "/app/logs/fetcher.log", level=logging.INFO):
-    """Setup structured logging with file and console outputs"""
+class JSONFormatter(logging.Formatter):
+    """JSON-lines log formatter (messages are properly escaped)"""
     
-    # Create logs directory
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    def format(self, record):
+        data = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.name,
+            "message": record.getMessage()
+        }
+        # exc_text when the record came through _TracebackQueueHandler
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        elif record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            return orjson.dumps(data).decode()
+        return json.dumps(data, ensure_ascii=False)
+
+class _TracebackQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback in exc_text instead of merging it into msg"""
     
-    # Root logger
-    logger = logging.getLogger()
-    logger.setLevel(level)
+    _traceback_formatter = logging.Formatter()
     
-    # File handler - JSON structured logs
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "module": "%(name)s", "message": "%(message)s"}'
-    )
-    file_handler.setFormatter(file_formatter)
+    def prepare(self, record):
+        # The stock prepare() folds the traceback into msg and drops exc_info, which would
+        # leave JSONFormatter no "exception" field; console output still appends exc_text
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._traceback_formatter.formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+_logging_configured = False
+
+def setup_logging(log_file: str = "/app/logs/fetcher.log", level=logging.INFO):
+    """Setup structured logging with file and console outputs (runs once)"""
+    global _logging_configured
+    
+    # Root logger
+    root = logging.getLogger()
+    if _logging_configured:
+        return root
+    _logging_configured = True
+    root.setLevel(level)
     
     # Console handler - colored output
     console_handler = logging.StreamHandler()
@@ -93,13 +155,34 @@ def setup_logging(log_file: str = "/app/logs/fetcher.log", level=logging.INFO):
         datefmt='%H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
+    handlers = [console_handler]
+    
+    # File handler - JSON structured logs (skipped if the log directory isn't writable)
+    file_error = None
+    try:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JSONFormatter())
+        handlers.insert(0, file_handler)
+    except OSError as e:
+        file_error = e
     
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Handlers run on a background thread; logging calls only enqueue the record
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
-    return logger
+    root.addHandler(_TracebackQueueHandler(log_queue))
+    
+    if file_error is not None:
+        root.warning(f"File logging disabled ({log_file}): {file_error}")
+    
+    return root
 
-logger = setup_logging()
+# Handlers are attached lazily by setup_logging() when a fetcher is created
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -109,41 +192,73 @@ logger = setup_logging()
 class ProgressBar:
     """Simple progress bar for downloads"""
     
+    BAR_LENGTH = 40
+    REDRAW_INTERVAL = 0.05  # seconds between redraws
+    _MB = 1.0 / (1024 * 1024)
+    
     def __init__(self, total: int, prefix: str = "Downloading"):
         self.total = total
         self.current = 0
         self.prefix = prefix
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        
+        # Precomputed per-bar constants
+        self._inv_total = 1.0 / total if total > 0 else 0.0
+        self._total_mb = total * self._MB
+        self._last_draw = 0.0
+        
+        # Pre-encoded ASCII output straight to the byte stream; replaced/captured stdouts
+        # (StringIO, Jupyter) have no .buffer, so those get the decoded text instead
+        stdout = sys.stdout
+        stdout.flush()  # keep earlier print() output ahead of the bar
+        buffer = getattr(stdout, "buffer", None)
+        if buffer is not None:
+            self._write, self._flush = buffer.write, buffer.flush
+        else:
+            self._write, self._flush = (lambda data: stdout.write(data.decode())), stdout.flush
+        self._head = f"\r{prefix}: [".encode()
+        self._bars = [b'#' * i + b'-' * (self.BAR_LENGTH - i) for i in range(self.BAR_LENGTH + 1)]
     
     def update(self, chunk_size: int):
-        """Update progress"""
+        """Update progress (redraws are throttled to REDRAW_INTERVAL)"""
         self.current += chunk_size
-        percent = (self.current / self.total) * 100 if self.total > 0 else 0
+        done = self.current >= self.total
         
-        # Calculate speed
-        elapsed = time.time() - self.start_time
-        speed = self.current / elapsed if elapsed > 0 else 0
+        now = time.monotonic()
+        if not done and now - self._last_draw < self.REDRAW_INTERVAL:
+            return
+        self._last_draw = now
         
-        # Format sizes
-        current_mb = self.current / (1024 * 1024)
-        total_mb = self.total / (1024 * 1024)
-        speed_mb = speed / (1024 * 1024)
+        fraction = min(1.0, self.current * self._inv_total)
         
-        # Progress bar
-        bar_length = 40
-        filled = int(bar_length * percent / 100)
-        bar = '█' * filled + '░' * (bar_length - filled)
+        # Calculate speed
+        elapsed = now - self.start_time
+        speed_mb = self.current * self._MB / elapsed if elapsed > 0 else 0
         
-        print(f"\r{self.prefix}: [{bar}] {percent:.1f}% ({current_mb:.2f}/{total_mb:.2f} MB) @ {speed_mb:.2f} MB/s", end='')
+        # Progress bar
+        filled = int(self.BAR_LENGTH * fraction)
+        bar = self._bars[filled]
         
-        if self.current >= self.total:
-            print()  # New line when complete
+        tail = (
+            f"] {fraction * 100:.1f}% "
+            f"({self.current * self._MB:.2f}/{self._total_mb:.2f} MB) @ {speed_mb:.2f} MB/s"
+        ).encode()
+        self._write(self._head + bar + tail + (b"\n" if done else b""))  # New line when complete
+        self._flush()
 
 
 # ============================================================================
 # ENHANCED ASYNC FETCHER
 # ============================================================================
 
+def _incremental_decoder(charset: Optional[str]) -> codecs.IncrementalDecoder:
+    """Streaming decoder for the response charset (UTF-8 if missing or unknown)"""
+    try:
+        return codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
 class EnhancedAsyncFetcher:
     """Async HTTPS fetcher with retry logic, logging, and progress tracking"""
     
@@ -152,15 +267,34 @@ class EnhancedAsyncFetcher:
                  retry_delay: float = 1.0,
                  timeout: int = 30,
                  proxy: Optional[str] = None,
-                 verify_ssl: bool = False):
+                 verify_ssl: bool = False,
+                 max_delay: float = 30.0,
+                 jitter: float = 0.5,
+                 connection_limit: int = 256,
+                 limit_per_host: int = 32,
+                 keepalive_timeout: float = 75.0,
+                 max_concurrency: int = 64,
+                 max_size: int = 50 * 1024 * 1024,
+                 connector: Optional[aiohttp.BaseConnector] = None):
+        
+        setup_logging()
         
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.connection_limit = connection_limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_concurrency = max_concurrency
+        self.max_size = max_size
         self.timeout = timeout
         self.proxy = proxy
         self.verify_ssl = verify_ssl
         self.download_dir = "/app/downloads"
         self.session: Optional[aiohttp.ClientSession] = None
+        # Externally owned connection pool (shared between fetchers); closed by its owner
+        self.connector = connector
         
         # Create SSL context
         self.ssl_context = ssl.create_default_context()
@@ -179,16 +313,36 @@ class EnhancedAsyncFetcher:
         """Context manager exit"""
         await self.close_session()
     
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """Connection pool with this fetcher's SSL and pool settings (call inside the event loop)"""
+        # Sized for batch_fetch; long keepalive reuses TLS connections across calls.
+        # aiohttp speaks HTTP/1.1 only, so same-host batches share up to
+        # limit_per_host pooled connections rather than one multiplexed HTTP/2 one.
+        return aiohttp.TCPConnector(
+            ssl=self.ssl_context,
+            resolver=aiohttp.AsyncResolver() if HAS_AIODNS else None,
+            use_dns_cache=True,
+            limit=self.connection_limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True,
+            ttl_dns_cache=300
+        )
+    
     async def create_session(self):
         """Create aiohttp session"""
         if self.session is None:
-            connector = aiohttp.TCPConnector(ssl=self.ssl_context)
             timeout = aiohttp.ClientTimeout(total=self.timeout)
             
             self.session = aiohttp.ClientSession(
-                connector=connector,
+                connector=self.connector or self.create_connector(),
+                connector_owner=self.connector is None,
                 timeout=timeout,
-                headers={'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+                read_bufsize=1024 * 1024,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+                    'Accept-Encoding': 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate'
+                }
             )
             logger.debug("Session created")
     
@@ -199,8 +353,11 @@ class EnhancedAsyncFetcher:
             self.session = None
             logger.debug("Session closed")
     
+    # HTTP statuses worth retrying; other 4xx are client errors and fail fast
+    RETRYABLE_STATUS = {408, 429}
+    
     async def _retry_wrapper(self, func, *args, **kwargs):
-        """Wrapper for retry logic with exponential backoff"""
+        """Wrapper for retry logic with capped, jittered exponential backoff"""
         last_error = None
         
         for attempt in range(self.max_retries):
@@ -224,18 +381,29 @@ class EnhancedAsyncFetcher:
                 last_error = NetworkError(f"Client error: {str(e)}")
                 logger.warning(f"Client error on attempt {attempt + 1}: {e}")
             
-            # Exponential backoff
+            except HTTPError as e:
+                if e.status_code < 500 and e.status_code not in self.RETRYABLE_STATUS:
+                    raise
+                last_error = e
+                logger.warning(f"HTTP {e.status_code} on attempt {attempt + 1}")
+            
+            # Exponential backoff, capped at max_delay, with jitter to spread out retries
             if attempt < self.max_retries - 1:
-                delay = self.retry_delay * (2 ** attempt)
-                logger.info(f"Retrying in {delay}s...")
+                delay = min(self.max_delay, self.retry_delay * (2 ** attempt))
+                delay *= 1 + random.random() * self.jitter
+                logger.info(f"Retrying in {delay:.2f}s...")
                 await asyncio.sleep(delay)
         
         # All retries failed
         logger.error(f"All {self.max_retries} attempts failed: {last_error}")
         raise last_error
     
-    async def fetch(self, url: str, headers: Dict[str, str] = None) -> Dict[str, Any]:
-        """Fetch URL with retry logic and logging"""
+    async def fetch(self, url: str, headers: Dict[str, str] = None, keep_raw: bool = False,
+                    include_headers: bool = False, max_bytes: Optional[int] = None,
+                    decode: bool = True) -> Dict[str, Any]:
+        """Fetch URL with retry logic and logging (keep_raw adds the body bytes as "raw";
+        max_bytes stops reading the body after that many bytes and marks it "truncated";
+        decode=False skips building the text "content")"""
         
         logger.info(f"Fetching: {url}")
         start_time = time.time()
@@ -250,30 +418,58 @@ class EnhancedAsyncFetcher:
                 
                 # Check HTTP status
                 if response.status >= 400:
-                    error_text = await response.text()
+                    # Only the head of the error page is reported, so don't download the rest
+                    error_bytes = await response.content.read(512)
+                    error_text = _incremental_decoder(response.charset).decode(error_bytes, final=True)
                     raise HTTPError(response.status, error_text[:200])
                 
-                content = await response.read()
+                # Refuse oversized bodies before reading them (unless only a prefix is wanted)
+                if (max_bytes is None and response.content_length is not None
+                        and response.content_length > self.max_size):
+                    raise FetchError(f"Response too large: {response.content_length} bytes (max {self.max_size})")
                 
-                # Try to decode
-                try:
-                    text_content = content.decode('utf-8')
-                except UnicodeDecodeError:
-                    text_content = content.decode('latin-1', errors='ignore')
+                # Decode while streaming so raw chunks are released as we go
+                decoder = _incremental_decoder(response.charset) if decode else None
+                parts = []
+                raw = bytearray() if keep_raw else None
+                size = 0
+                truncated = False
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    if max_bytes is not None and size + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - size]
+                        truncated = True
+                    if decoder is not None:
+                        parts.append(decoder.decode(chunk))
+                    if raw is not None:
+                        raw += chunk
+                    size += len(chunk)
+                    if truncated:
+                        break  # the unread remainder is dropped with the connection
+                    if size > self.max_size:
+                        raise FetchError(f"Response too large: over {self.max_size} bytes")
+                if decoder is not None:
+                    parts.append(decoder.decode(b'', final=True))
                 
                 elapsed = time.time() - start_time
-                logger.info(f"✅ Success: {url} ({response.status}) - {len(content)} bytes in {elapsed:.2f}s")
+                logger.info(f"✅ Success: {url} ({response.status}) - {size} bytes in {elapsed:.2f}s")
                 
-                return {
+                result = {
                     "success": True,
                     "url": str(response.url),
                     "status": response.status,
-                    "headers": dict(response.headers),
-                    "content": text_content,
-                    "size": len(content),
+                    "size": size,
                     "elapsed": elapsed,
                     "ssl_verified": self.verify_ssl
                 }
+                if decoder is not None:
+                    result["content"] = ''.join(parts)
+                if include_headers:
+                    result["headers"] = dict(response.headers)
+                if truncated:
+                    result["truncated"] = True
+                if raw is not None:
+                    result["raw"] = raw
+                return result
         
         try:
             return await self._retry_wrapper(_fetch)
@@ -290,11 +486,14 @@ class EnhancedAsyncFetcher:
         """Fetch and parse JSON response"""
         
         logger.info(f"Fetching JSON: {url}")
-        result = await self.fetch(url, headers)
+        # Parsed straight from the body bytes; no intermediate text copy
+        result = await self.fetch(url, headers, keep_raw=True, decode=False)
         
         if result["success"]:
             try:
-                result["json"] = json.loads(result["content"])
+                # Parse the raw bytes directly (orjson when installed)
+                raw = result.pop("raw")
+                result["json"] = orjson.loads(raw) if orjson is not None else json.loads(raw)
                 logger.debug(f"JSON parsed successfully: {len(result['json'])} items")
             except json.JSONDecodeError as e:
                 error_msg = f"JSON parse error: {str(e)}"
@@ -330,14 +529,19 @@ class EnhancedAsyncFetcher:
                 # Initialize progress bar
                 progress = ProgressBar(total_size, f"Downloading {filename}") if show_progress and total_size > 0 else None
                 
-                # Download in chunks
+                # Download in chunks; disk writes run in a worker thread so the
+                # event loop keeps serving other fetches/downloads
                 downloaded = 0
-                with open(filepath, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(8192):
-                        f.write(chunk)
+                f = await asyncio.to_thread(open, filepath, 'wb')
+                try:
+                    # iter_any hands over whatever is buffered (up to read_bufsize) without re-slicing
+                    async for chunk in response.content.iter_any():
+                        await asyncio.to_thread(f.write, chunk)
                         downloaded += len(chunk)
                         if progress:
                             progress.update(len(chunk))
+                finally:
+                    await asyncio.to_thread(f.close)
                 
                 elapsed = time.time() - start_time
                 logger.info(f"✅ Downloaded: {filename} ({downloaded} bytes in {elapsed:.2f}s)")
@@ -362,39 +566,50 @@ class EnhancedAsyncFetcher:
                 "url": url
             }
     
-    async def batch_fetch(self, urls: List[str]) -> List[Dict[str, Any]]:
-        """Fetch multiple URLs concurrently"""
+    async def batch_fetch(self, urls: List[str], max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch multiple URLs concurrently (max_bytes is passed through to fetch)"""
         
         logger.info(f"Batch fetching {len(urls)} URLs")
         start_time = time.time()
         
-        tasks = [self.fetch(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Convert exceptions to error dicts
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append({
-                    "success": False,
-                    "error": str(result),
-                    "url": urls[i]
-                })
-            else:
-                processed_results.append(result)
+        # Only max_concurrency fetches hold a connection slot at a time
+        sem = asyncio.Semaphore(self.max_concurrency)
+        
+        async def _one(url):
+            async with sem:
+                try:
+                    return await self.fetch(url, max_bytes=max_bytes)
+                except Exception as e:
+                    # fetch() already turns FetchError into a result dict; this covers anything else
+                    return {"success": False, "error": str(e), "url": url}
+        
+        results = await asyncio.gather(*[_one(url) for url in urls])
         
         elapsed = time.time() - start_time
-        successful = sum(1 for r in processed_results if r.get("success"))
+        successful = sum(r["success"] for r in results)
         
         logger.info(f"Batch complete: {successful}/{len(urls)} successful in {elapsed:.2f}s")
         
-        return processed_results
+        return results
 
 
 # ============================================================================
 # CLI INTERFACE
 # ============================================================================
 
+def tail_file(path: str, lines: int = 20, blocksize: int = 16384) -> List[str]:
+    """Return the last lines of a file, reading only its final block"""
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - blocksize))
+        data = f.read()
+    
+    chunks = data.splitlines()
+    if size > blocksize:
+        chunks = chunks[1:]  # first line is probably partial
+    return [line.decode('utf-8', 'replace') for line in chunks[-lines:]]
+
+
 async def main():
     """Enhanced CLI interface"""
     
@@ -525,10 +740,9 @@ async def main():
                 elif action == "logs":
                     print("\n📋 Recent logs (last 20 lines):")
                     try:
-                        with open("/app/logs/fetcher.log", "r") as f:
-                            lines = f.readlines()
-                            for line in lines[-20:]:
-                                print(line.strip())
+                        lines = await asyncio.to_thread(tail_file, "/app/logs/fetcher.log", 20)
+                        for line in lines:
+                            print(line.strip())
                     except FileNotFoundError:
                         print("No logs found yet")
                 
@@ -539,6 +753,8 @@ async def main():
                     print(f"  Timeout: {fetcher.timeout}s")
                     print(f"  SSL Verify: {fetcher.verify_ssl}")
                     print(f"  Proxy: {fetcher.proxy or 'None'}")
+                    print(f"  Connection Limit: {fetcher.connection_limit} ({fetcher.limit_per_host} per host)")
+                    print(f"  Keepalive: {fetcher.keepalive_timeout}s")
                     print(f"  Session Active: {fetcher.session is not None}")
                 
                 else:
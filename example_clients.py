@@ -6,6 +6,7 @@ Shows how to connect from different LLM clients
 
 import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 # ============================================================================
@@ -17,15 +18,21 @@ class HTTPClient:
     
     def __init__(self, base_url="http://localhost:8000"):
         self.base_url = base_url
+        
+        # Keep-alive connection pool shared by all calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=50, pool_maxsize=100)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def list_tools(self):
         """List available tools"""
-        response = requests.get(f"{self.base_url}/tools")
+        response = self.session.get(f"{self.base_url}/tools")
         return response.json()
     
     def navigate(self, url):
         """Navigate to URL"""
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/navigate",
             json={"url": url}
         )
@@ -33,19 +40,33 @@ class HTTPClient:
     
     def screenshot(self, filename="test.png"):
         """Take screenshot"""
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/screenshot",
             json={"filename": filename}
         )
         return response.json()
     
+    def get_screenshot(self, filename="test.png"):
+        """Download a saved screenshot as raw PNG bytes"""
+        response = self.session.get(f"{self.base_url}/screenshots/{filename}")
+        response.raise_for_status()
+        return response.content
+    
     def call_tool(self, tool_name, arguments):
         """Call any tool"""
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/call/{tool_name}",
             json={"arguments": arguments}
         )
         return response.json()
+    
+    def batch_call(self, calls):
+        """Call several tools in one request; calls is a list of {"tool", "arguments"}"""
+        response = self.session.post(
+            f"{self.base_url}/batch_call",
+            json={"calls": calls}
+        )
+        return response.json()
 
 
 # ============================================================================
@@ -153,10 +174,14 @@ def get_openai_functions():
         }
     ]
 
+_function_client = None
+
 def execute_function(function_name, arguments):
     """Execute function called by OpenAI"""
-    client = HTTPClient()
-    return client.call_tool(function_name, arguments)
+    global _function_client
+    if _function_client is None:
+        _function_client = HTTPClient()
+    return _function_client.call_tool(function_name, arguments)
 
 
 # ============================================================================
@@ -282,6 +307,17 @@ def main():
         print("\n3. Taking screenshot...")
         screenshot = client.screenshot("http_test.png")
         print(f"Screenshot: {screenshot}")
+        
+        print("\n4. Batch call (navigate + network summary)...")
+        batch = client.batch_call([
+            {"tool": "browser_navigate", "arguments": {"url": "https://example.com"}},
+            {"tool": "browser_network_summary", "arguments": {}}
+        ])
+        failed = [r for r in batch["results"] if not r["success"]]
+        if failed:
+            print(f"❌ {len(failed)}/{batch['count']} calls failed: {failed}")
+        else:
+            print(f"✅ {batch['count']} calls succeeded: {[r['result'] for r in batch['results']]}")
     
     elif choice == "2":
         print("\n📍 MCP Client Example (async)")
@@ -4,145 +4,90 @@ LM Studio Bridge for Unsafe Browser MCP
 Connects LM Studio to browser automation tools
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
 import sys
+from typing import Optional
+
+from tool_schema import openai_tools
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
 
 # Configuration
 LM_STUDIO_URL = "http://localhost:1234/v1/chat/completions"
 MCP_URL = "http://localhost:8000"
+LM_STUDIO_MODELS_URL = LM_STUDIO_URL.replace('/v1/chat/completions', '/v1/models')
+MCP_HEALTH_URL = f"{MCP_URL}/health"
+
+# One HTTP session for LM Studio and the MCP server, reused across turns
+# (created lazily inside the event loop, closed by run())
+_session: Optional[aiohttp.ClientSession] = None
 
-# Tool definitions for LM Studio (OpenAI format)
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_navigate",
-            "description": "Navigate to a URL in the browser. Returns page title and status.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "The URL to navigate to (e.g., https://example.com)"
-                    }
-                },
-                "required": ["url"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_screenshot",
-            "description": "Take a screenshot of the current page. Returns base64 image data.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "filename": {
-                        "type": "string",
-                        "description": "Filename for the screenshot (default: screenshot.png)"
-                    },
-                    "full_page": {
-                        "type": "boolean",
-                        "description": "Capture full page or just viewport (default: true)"
-                    }
-                }
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_click",
-            "description": "Click an element on the page. Supports CSS selectors or smart keywords.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector or keyword (e.g., 'login_button', '#submit-btn')"
-                    }
-                },
-                "required": ["selector"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_fill",
-            "description": "Fill an input field with text",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the input field"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text to fill in the field"
-                    }
-                },
-                "required": ["selector", "text"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_save_session",
-            "description": "Save current browser session (cookies and URL) for later use",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "Name for the session (default: default)"
-                    }
-                }
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "browser_load_session",
-            "description": "Load a previously saved browser session",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "Name of the session to load"
-                    },
-                    "auto_navigate": {
-                        "type": "boolean",
-                        "description": "Automatically navigate to saved URL (default: false)"
-                    }
-                },
-                "required": ["name"]
-            }
-        }
-    }
-]
+# Tool definitions for LM Studio (OpenAI format), from the shared schema
+TOOLS = openai_tools([
+    "browser_navigate",
+    "browser_screenshot",
+    "browser_click",
+    "browser_fill",
+    "browser_save_session",
+    "browser_load_session",
+])
 
+# TOOLS never changes, so it is serialized once and spliced into every chat request body
+_TOOLS_JSON = json.dumps(TOOLS, separators=(",", ":")).encode()
+_CHAT_BODY = b'{"model":%s,"messages":%s,"tools":%s,"tool_choice":"auto","temperature":0.7,"max_tokens":2000}'
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get or create the shared aiohttp session (keep-alive pool for both local services)"""
+    global _session
+    if _session is None:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, enable_cleanup_closed=True),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    return _session
 
-def execute_tool(tool_name, arguments):
+
+async def close_session():
+    """Close the shared session"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def execute_tool(tool_name, arguments):
     """Execute MCP tool via HTTP"""
     try:
-        response = requests.post(
+        session = await get_session()
+        async with session.post(
             f"{MCP_URL}/call/{tool_name}",
-            json={"arguments": arguments},
-            timeout=30
-        )
-        return response.json()
+            json={"arguments": arguments}
+        ) as response:
+            return await response.json()
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def chat_with_browser(user_message, model="local-model", verbose=True):
+async def execute_tools(calls):
+    """Execute several MCP tools with a single /batch_call request"""
+    try:
+        session = await get_session()
+        async with session.post(
+            f"{MCP_URL}/batch_call",
+            json={"calls": [{"tool": name, "arguments": args} for name, args in calls]}
+        ) as response:
+            return (await response.json())["results"]
+    except Exception as e:
+        return [{"success": False, "error": str(e)} for _ in calls]
+
+
+async def chat_with_browser(user_message, model="local-model", verbose=True):
     """
     Chat with LM Studio with browser automation tools
     
@@ -162,40 +107,44 @@ def chat_with_browser(user_message, model="local-model", verbose=True):
     
     try:
         # Call LM Studio with tools
-        response = requests.post(
+        body = _CHAT_BODY % (json.dumps(model).encode(), json.dumps(messages).encode(), _TOOLS_JSON)
+        session = await get_session()
+        async with session.post(
             LM_STUDIO_URL,
-            json={
-                "model": model,
-                "messages": messages,
-                "tools": TOOLS,
-                "tool_choice": "auto",
-                "temperature": 0.7,
-                "max_tokens": 2000
-            },
-            timeout=60
-        )
-        
-        if response.status_code != 200:
-            return {"error": f"LM Studio error: {response.status_code}", "details": response.text}
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=60)
+        ) as response:
+            if response.status != 200:
+                return {"error": f"LM Studio error: {response.status}", "details": await response.text()}
+            
+            result = await response.json()
         
-        result = response.json()
         assistant_message = result["choices"][0]["message"]
         
         # Check if LM wants to call a tool
         if assistant_message.get("tool_calls"):
-            results = []
+            calls = []
             
             for tool_call in assistant_message["tool_calls"]:
                 function_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
+                raw_arguments = tool_call["function"]["arguments"]
+                arguments = orjson.loads(raw_arguments) if orjson is not None else json.loads(raw_arguments)
                 
                 if verbose:
                     print(f"\n🔧 Calling tool: {function_name}")
                     print(f"📋 Arguments: {json.dumps(arguments, indent=2)}")
                 
-                # Execute tool via MCP
-                tool_result = execute_tool(function_name, arguments)
-                
+                calls.append((function_name, arguments))
+            
+            # Execute all tool calls from this response in one MCP round-trip
+            if len(calls) > 1:
+                tool_results = await execute_tools(calls)
+            else:
+                tool_results = [await execute_tool(*calls[0])]
+            
+            results = []
+            for (function_name, arguments), tool_result in zip(calls, tool_results):
                 if verbose:
                     print(f"✅ Result: {json.dumps(tool_result, indent=2)[:200]}...")
                 
@@ -214,7 +163,7 @@ def chat_with_browser(user_message, model="local-model", verbose=True):
         return {"error": str(e)}
 
 
-def interactive_mode():
+async def interactive_mode():
     """Interactive chat mode"""
     print("="*70)
     print("🤖 LM Studio + Browser Automation")
@@ -237,7 +186,7 @@ def interactive_mode():
             if not user_input:
                 continue
             
-            result = chat_with_browser(user_input)
+            result = await chat_with_browser(user_input)
             
             if isinstance(result, dict) and result.get("type") == "text":
                 print(f"\n🤖 Assistant: {result['content']}")
@@ -251,38 +200,55 @@ def interactive_mode():
             print(f"\n❌ Error: {e}")
 
 
-def main():
-    """Main entry point"""
-    
-    # Check if MCP server is running
+async def probe(url):
+    """True if anything answers at url within 2 seconds"""
     try:
-        response = requests.get(f"{MCP_URL}/health", timeout=2)
-        print("✅ MCP Server is running")
-    except:
-        print("❌ MCP Server is not running!")
-        print(f"   Start it with: python mcp_server_http.py")
-        sys.exit(1)
-    
-    # Check if LM Studio is running
+        session = await get_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=2)):
+            return True
+    except Exception:
+        return False
+
+
+async def run(args):
+    """Check both services, run a single command or the interactive loop, then close the session"""
     try:
-        response = requests.get(f"{LM_STUDIO_URL.replace('/v1/chat/completions', '/v1/models')}", timeout=2)
+        # Probe the MCP server and LM Studio in parallel
+        mcp_ok, lm_studio_ok = await asyncio.gather(
+            probe(MCP_HEALTH_URL),
+            probe(LM_STUDIO_MODELS_URL)
+        )
+        
+        if not mcp_ok:
+            print("❌ MCP Server is not running!")
+            print(f"   Start it with: python mcp_server_http.py")
+            sys.exit(1)
+        print("✅ MCP Server is running")
+        
+        if not lm_studio_ok:
+            print("❌ LM Studio is not running!")
+            print("   Start LM Studio and enable the local server")
+            sys.exit(1)
         print("✅ LM Studio is running")
-    except:
-        print("❌ LM Studio is not running!")
-        print("   Start LM Studio and enable the local server")
-        sys.exit(1)
-    
-    print()
-    
-    # Check for command line argument
-    if len(sys.argv) > 1:
-        # Single command mode
-        user_message = " ".join(sys.argv[1:])
-        result = chat_with_browser(user_message)
-        print(json.dumps(result, indent=2))
-    else:
-        # Interactive mode
-        interactive_mode()
+        
+        print()
+        
+        # Check for command line argument
+        if args:
+            # Single command mode
+            user_message = " ".join(args)
+            result = await chat_with_browser(user_message)
+            print(json.dumps(result, indent=2))
+        else:
+            # Interactive mode
+            await interactive_mode()
+    finally:
+        await close_session()
+
+
+def main():
+    """Main entry point"""
+    asyncio.run(run(sys.argv[1:]))
 
 
 if __name__ == "__main__":
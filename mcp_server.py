@@ -8,463 +8,308 @@ import asyncio
 import json
 import sys
 import os
-from typing import Any, Dict, List, Optional
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
 import base64
 
-# Import our enhanced browser
-from enhanced_browser_mcp import EnhancedBrowser
-from enhanced_simple_fetcher import EnhancedAsyncFetcher
+from tool_schema import TOOL_SPECS, input_schema
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:  # optional SIMD base64 for screenshots, stdlib base64 is the fallback
+    pybase64 = None
+
+try:
+    import uvloop
+except ImportError:  # optional faster event loop (not available on Windows)
+    uvloop = None
+
+# Our enhanced browser/fetcher (and playwright/aiohttp) are imported on first use
+# in get_browser/get_fetcher, so the stdio handshake and list_tools don't wait for them
+if TYPE_CHECKING:
+    from enhanced_browser_mcp import EnhancedBrowser
+    from enhanced_simple_fetcher import EnhancedAsyncFetcher
 
 # Initialize MCP server
 app = Server("unsafe-browser-mcp")
+logger = logging.getLogger(__name__)
+
+def jdumps(obj: Any) -> str:
+    """Compact JSON for tool results (orjson when installed); clients parse it, nobody reads the indent"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def jloads(data: Any) -> Any:
+    """Parse JSON text or bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_base64(path: str, chunk_size: int = 3 * 64 * 1024) -> str:
+    """Blocking read + base64 encode in 3-byte-aligned chunks, run via asyncio.to_thread"""
+    b64encode = pybase64.b64encode if pybase64 is not None else base64.b64encode
+    encoded = bytearray()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            encoded += b64encode(chunk)
+    return encoded.decode()
+
 
 # Global browser instance
-browser: Optional[EnhancedBrowser] = None
-fetcher: Optional[EnhancedAsyncFetcher] = None
+browser: Optional["EnhancedBrowser"] = None
+fetcher: Optional["EnhancedAsyncFetcher"] = None
+# Connection pool shared by every fetcher in this process (TLS sessions + DNS cache)
+connector: Optional[Any] = None
 
 
-async def get_browser() -> EnhancedBrowser:
+async def get_browser() -> "EnhancedBrowser":
     """Get or create browser instance"""
     global browser
     if browser is None:
-        browser = EnhancedBrowser()
+        from enhanced_browser_mcp import EnhancedBrowser
+        # Optional persistent Chromium profile (keeps cookies/localStorage across restarts)
+        browser = EnhancedBrowser(persistent_profile=os.environ.get("BROWSER_PROFILE_DIR"))
         await browser.initialize()
     return browser
 
 
-async def get_fetcher() -> EnhancedAsyncFetcher:
+async def get_fetcher() -> "EnhancedAsyncFetcher":
     """Get or create fetcher instance"""
-    global fetcher
+    global fetcher, connector
     if fetcher is None:
-        fetcher = EnhancedAsyncFetcher()
+        from enhanced_simple_fetcher import EnhancedAsyncFetcher
+        fetcher = EnhancedAsyncFetcher(connector=connector)
+        if connector is None:
+            connector = fetcher.connector = fetcher.create_connector()
         await fetcher.create_session()
     return fetcher
 
 
+def session_summaries(b: "EnhancedBrowser") -> List[Dict[str, Any]]:
+    """Saved sessions as name/cookie_count/url/saved_at dicts (one directory scan; blocking, run via asyncio.to_thread)"""
+    summaries = []
+    for data in b.session_manager.list_sessions_detailed():
+        if len(data) == 1:  # metadata unreadable, name only
+            summaries.append(data)
+            continue
+        summaries.append({
+            "name": data["name"],
+            "cookie_count": data.get("cookie_count", 0),
+            "url": data.get("current_url", "N/A"),
+            "saved_at": data.get("saved_at", "N/A")
+        })
+    return summaries
+
+
+# In-flight session scan shared by concurrent listing requests
+_session_listing: Optional[asyncio.Future] = None
+
+
+def _clear_session_listing(_future: asyncio.Future) -> None:
+    global _session_listing
+    _session_listing = None
+
+
+async def list_session_summaries(b: "EnhancedBrowser") -> List[Dict[str, Any]]:
+    """session_summaries() off the event loop; concurrent callers share one scan"""
+    global _session_listing
+    if _session_listing is None:
+        _session_listing = asyncio.ensure_future(asyncio.to_thread(session_summaries, b))
+        _session_listing.add_done_callback(_clear_session_listing)
+    return await asyncio.shield(_session_listing)
+
+
 # ============================================================================
 # MCP TOOLS REGISTRATION
 # ============================================================================
 
+# Tool schemas are static (tool_schema.TOOL_SPECS), so the list is built once at import
+TOOL_LIST: List[Tool] = [
+    Tool(name=name, description=description, inputSchema=input_schema(params))
+    for name, description, params in TOOL_SPECS
+]
+
+
 @app.list_tools()
 async def list_tools() -> List[Tool]:
     """List all available browser tools"""
-    return [
-        # Navigation Tools
-        Tool(
-            name="browser_navigate",
-            description="Navigate to a URL in the browser. Returns page title and status.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "The URL to navigate to"
-                    }
-                },
-                "required": ["url"]
-            }
-        ),
-        
-        # Interaction Tools
-        Tool(
-            name="browser_click",
-            description="Click an element on the page. Supports CSS selectors or smart keywords (login_button, username, etc.)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector or smart keyword (e.g., 'login_button', '#submit-btn')"
-                    }
-                },
-                "required": ["selector"]
-            }
-        ),
-        
-        Tool(
-            name="browser_fill",
-            description="Fill an input field with text",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the input field"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text to fill in the field"
-                    }
-                },
-                "required": ["selector", "text"]
-            }
-        ),
-        
-        Tool(
-            name="browser_screenshot",
-            description="Take a screenshot of the current page",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filename": {
-                        "type": "string",
-                        "description": "Filename for the screenshot (default: screenshot.png)"
-                    },
-                    "full_page": {
-                        "type": "boolean",
-                        "description": "Capture full page or just viewport (default: true)"
-                    }
-                },
-                "required": []
-            }
-        ),
-        
-        # Smart Features
-        Tool(
-            name="browser_suggest_selectors",
-            description="Get suggestions for available selectors on the page",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "element_type": {
-                        "type": "string",
-                        "description": "Element type to search for (button, input, a, etc.)"
-                    }
-                },
-                "required": ["element_type"]
-            }
-        ),
-        
-        # Session Management
-        Tool(
-            name="browser_save_session",
-            description="Save current browser session (cookies, URL) for later use",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "Name for the session (default: default)"
-                    }
-                },
-                "required": []
-            }
-        ),
-        
-        Tool(
-            name="browser_load_session",
-            description="Load a previously saved browser session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "Name of the session to load"
-                    },
-                    "auto_navigate": {
-                        "type": "boolean",
-                        "description": "Automatically navigate to saved URL (default: false)"
-                    }
-                },
-                "required": ["name"]
-            }
-        ),
-        
-        Tool(
-            name="browser_list_sessions",
-            description="List all saved browser sessions",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        ),
-        
-        # Network Tools
-        Tool(
-            name="browser_network_summary",
-            description="Get summary of network activity (requests/responses)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        ),
-        
-        # Fetcher Tools
-        Tool(
-            name="fetch_url",
-            description="Fetch a URL with SSL bypass and retry logic. Returns content and metadata.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "URL to fetch"
-                    }
-                },
-                "required": ["url"]
-            }
-        ),
-        
-        Tool(
-            name="fetch_json",
-            description="Fetch and parse JSON from a URL",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "URL to fetch JSON from"
-                    }
-                },
-                "required": ["url"]
-            }
-        ),
-        
-        Tool(
-            name="download_file",
-            description="Download a file from URL",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "URL to download from"
-                    },
-                    "filename": {
-                        "type": "string",
-                        "description": "Filename to save as"
-                    }
-                },
-                "required": ["url", "filename"]
-            }
-        ),
-        
-        Tool(
-            name="batch_fetch",
-            description="Fetch multiple URLs concurrently (10-15x faster)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "urls": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "List of URLs to fetch"
-                    }
-                },
-                "required": ["urls"]
-            }
-        ),
-    ]
+    return TOOL_LIST
 
 
 # ============================================================================
 # TOOL CALL HANDLERS
 # ============================================================================
 
-@app.call_tool()
-async def call_tool(name: str, arguments: Any) -> List[TextContent | ImageContent | EmbeddedResource]:
-    """Handle tool calls from Claude"""
+async def _navigate(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.navigate(arguments["url"])
+
+
+async def _click(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.smart_click(arguments["selector"])
+
+
+async def _fill(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.fill(arguments["selector"], arguments["text"])
+
+
+async def _suggest_selectors(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.suggest_selectors(arguments["element_type"])
+
+
+async def _save_session(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.save_session(arguments.get("name", "default"))
+
+
+async def _load_session(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.load_session(arguments["name"], arguments.get("auto_navigate", False))
+
+
+async def _list_sessions(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return {"sessions": await list_session_summaries(b)}
+
+
+async def _network_summary(arguments: Dict[str, Any]) -> Any:
+    b = await get_browser()
+    return await b.get_network_summary()
+
+
+async def _fetch_url(arguments: Dict[str, Any]) -> Any:
+    f = await get_fetcher()
+    # Only a preview is returned, so stop reading after 4 bytes per kept character (UTF-8 worst case)
+    result = await f.fetch(arguments["url"], include_headers=True, max_bytes=4 * 1000)
+    
+    # Truncate content for display
+    if result.get("success") and "content" in result:
+        content_preview = result["content"][:1000]
+        result["content"] = content_preview
+        result["content_truncated"] = True
+    
+    return result
+
+
+async def _fetch_json(arguments: Dict[str, Any]) -> Any:
+    f = await get_fetcher()
+    return await f.fetch_json(arguments["url"])
+
+
+async def _download_file(arguments: Dict[str, Any]) -> Any:
+    f = await get_fetcher()
+    return await f.download_file(
+        arguments["url"],
+        arguments["filename"],
+        show_progress=False
+    )
+
+
+async def _batch_fetch(arguments: Dict[str, Any]) -> Any:
+    f = await get_fetcher()
+    results = await f.batch_fetch(arguments["urls"], max_bytes=4 * 500)
+    
+    # Truncate content
+    for r in results:
+        if r.get("success") and "content" in r:
+            r["content"] = r["content"][:500]
+            r["content_truncated"] = True
+    
+    return {"results": results}
+
+
+async def _screenshot(arguments: Dict[str, Any]) -> List[TextContent | ImageContent]:
+    """Screenshot returns the image itself alongside the text result"""
+    b = await get_browser()
+    filename = arguments.get("filename", "screenshot.png")
+    full_page = arguments.get("full_page", True)
+    
+    result = await b.screenshot(filename, full_page)
+    
+    if not result["success"]:
+        return [TextContent(type="text", text=jdumps(result))]
     
+    # Read screenshot off the event loop and return as base64
     try:
-        # Browser Navigation
-        if name == "browser_navigate":
-            b = await get_browser()
-            result = await b.navigate(arguments["url"])
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Browser Click
-        elif name == "browser_click":
-            b = await get_browser()
-            result = await b.smart_click(arguments["selector"])
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Browser Fill
-        elif name == "browser_fill":
-            b = await get_browser()
-            result = await b.fill(arguments["selector"], arguments["text"])
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Browser Screenshot
-        elif name == "browser_screenshot":
-            b = await get_browser()
-            filename = arguments.get("filename", "screenshot.png")
-            full_page = arguments.get("full_page", True)
-            
-            result = await b.screenshot(filename, full_page)
-            
-            if result["success"]:
-                # Read screenshot and return as base64
-                try:
-                    filepath = os.path.join(b.screenshot_dir, filename)
-                    with open(filepath, "rb") as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    
-                    return [
-                        TextContent(
-                            type="text",
-                            text=f"Screenshot saved: {filename}"
-                        ),
-                        ImageContent(
-                            type="image",
-                            data=img_data,
-                            mimeType="image/png"
-                        )
-                    ]
-                except Exception as e:
-                    return [TextContent(
-                        type="text",
-                        text=f"Screenshot saved but couldn't read: {e}"
-                    )]
-            else:
-                return [TextContent(
-                    type="text",
-                    text=json.dumps(result, indent=2)
-                )]
-        
-        # Suggest Selectors
-        elif name == "browser_suggest_selectors":
-            b = await get_browser()
-            result = await b.suggest_selectors(arguments["element_type"])
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Save Session
-        elif name == "browser_save_session":
-            b = await get_browser()
-            name_arg = arguments.get("name", "default")
-            result = await b.save_session(name_arg)
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Load Session
-        elif name == "browser_load_session":
-            b = await get_browser()
-            name_arg = arguments["name"]
-            auto_nav = arguments.get("auto_navigate", False)
-            result = await b.load_session(name_arg, auto_nav)
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # List Sessions
-        elif name == "browser_list_sessions":
-            b = await get_browser()
-            sessions = b.session_manager.list_sessions()
-            
-            # Get session details
-            session_details = []
-            for s in sessions:
-                try:
-                    session_path = os.path.join(b.session_manager.session_dir, f"{s}.json")
-                    with open(session_path, 'r') as f:
-                        data = json.load(f)
-                    session_details.append({
-                        "name": s,
-                        "cookie_count": data.get("cookie_count", 0),
-                        "url": data.get("current_url", "N/A"),
-                        "saved_at": data.get("saved_at", "N/A")
-                    })
-                except:
-                    session_details.append({"name": s})
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps({"sessions": session_details}, indent=2)
-            )]
-        
-        # Network Summary
-        elif name == "browser_network_summary":
-            b = await get_browser()
-            result = await b.get_network_summary()
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
+        filepath = os.path.join(b.screenshot_dir, filename)
+        img_data = await asyncio.to_thread(read_base64, filepath)
         
-        # Fetch URL
-        elif name == "fetch_url":
-            f = await get_fetcher()
-            result = await f.fetch(arguments["url"])
-            
-            # Truncate content for display
-            if result.get("success") and "content" in result:
-                content_preview = result["content"][:1000]
-                result["content"] = content_preview
-                result["content_truncated"] = True
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Fetch JSON
-        elif name == "fetch_json":
-            f = await get_fetcher()
-            result = await f.fetch_json(arguments["url"])
-            return [TextContent(
+        return [
+            TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Download File
-        elif name == "download_file":
-            f = await get_fetcher()
-            result = await f.download_file(
-                arguments["url"],
-                arguments["filename"],
-                show_progress=False
+                text=f"Screenshot saved: {filename}"
+            ),
+            ImageContent(
+                type="image",
+                data=img_data,
+                mimeType="image/png"
             )
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        # Batch Fetch
-        elif name == "batch_fetch":
-            f = await get_fetcher()
-            results = await f.batch_fetch(arguments["urls"])
-            
-            # Truncate content
-            for r in results:
-                if r.get("success") and "content" in r:
-                    r["content"] = r["content"][:500]
-                    r["content_truncated"] = True
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps({"results": results}, indent=2)
-            )]
+        ]
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Screenshot saved but couldn't read: {e}"
+        )]
+
+
+# Tool name -> handler returning a JSON-serializable result
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    "browser_navigate": _navigate,
+    "browser_click": _click,
+    "browser_fill": _fill,
+    "browser_suggest_selectors": _suggest_selectors,
+    "browser_save_session": _save_session,
+    "browser_load_session": _load_session,
+    "browser_list_sessions": _list_sessions,
+    "browser_network_summary": _network_summary,
+    "fetch_url": _fetch_url,
+    "fetch_json": _fetch_json,
+    "download_file": _download_file,
+    "batch_fetch": _batch_fetch,
+}
+
+
+@app.call_tool()
+async def call_tool(name: str, arguments: Any) -> List[TextContent | ImageContent | EmbeddedResource]:
+    """Handle tool calls from Claude"""
+    
+    try:
+        if name == "browser_screenshot":
+            return await _screenshot(arguments)
         
-        else:
+        handler = HANDLERS.get(name)
+        if handler is None:
             return [TextContent(
                 type="text",
                 text=f"Unknown tool: {name}"
             )]
+        
+        result = await handler(arguments)
+        return [TextContent(
+            type="text",
+            text=jdumps(result)
+        )]
     
     except Exception as e:
-        import traceback
+        # Full traceback goes to the log; the caller only gets the error itself
+        logger.exception("Tool %s failed", name)
         return [TextContent(
             type="text",
-            text=f"Error executing {name}: {str(e)}\n{traceback.format_exc()}"
+            text=jdumps({"error": type(e).__name__, "message": str(e), "tool": name})
         )]
 
 
@@ -474,7 +319,7 @@ async def call_tool(name: str, arguments: Any) -> List[TextContent | ImageConten
 
 async def cleanup():
     """Cleanup browser and fetcher instances"""
-    global browser, fetcher
+    global browser, fetcher, connector
     
     if browser:
         await browser.cleanup()
@@ -483,6 +328,10 @@ async def cleanup():
     if fetcher:
         await fetcher.close_session()
         fetcher = None
+    
+    if connector is not None:
+        await connector.close()
+        connector = None
 
 
 # ============================================================================
@@ -500,6 +349,8 @@ async def main():
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         asyncio.run(main())
     finally:
@@ -6,22 +6,31 @@ Allows web-based LLM clients to connect via HTTP
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, FileResponse, Response
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import asyncio
-import json
+import os
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
 # Import MCP server components
-from mcp_server import get_browser, get_fetcher, cleanup
-from mcp_server import app as mcp_app
+from mcp_server import get_browser, get_fetcher, cleanup, list_session_summaries, jloads, jdumps, read_base64
+from mcp_server import TOOL_LIST
+# The @app.call_tool() handler itself; Server.call_tool is only the decorator factory
+from mcp_server import call_tool as run_mcp_tool
 
 # FastAPI app
 app = FastAPI(
     title="Unsafe Browser MCP HTTP Server",
     description="HTTP/REST API wrapper for MCP browser automation",
-    version="2.0.0"
+    version="2.0.0",
+    # Endpoint results are encoded by orjson when installed
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # Enable CORS for web clients
@@ -34,9 +43,19 @@ app.add_middleware(
 )
 
 # Request models
+# Kept as Pydantic models: FastAPI validates them in pydantic-core (compiled) and
+# derives the /docs schema from them. The bodies are small and flat, so decoding
+# them with msgspec instead would save little and drop that integration.
 class ToolCallRequest(BaseModel):
     arguments: Dict[str, Any]
 
+class ToolCall(BaseModel):
+    tool: str
+    arguments: Dict[str, Any] = {}
+
+class BatchCallRequest(BaseModel):
+    calls: List[ToolCall]
+
 class NavigateRequest(BaseModel):
     url: str
 
@@ -50,59 +69,110 @@ class FillRequest(BaseModel):
 class ScreenshotRequest(BaseModel):
     filename: Optional[str] = "screenshot.png"
     full_page: Optional[bool] = True
+    inline: Optional[bool] = False  # embed base64 PNG instead of returning its URL
 
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
 
+# The API description is static: serialize it once
+ROOT_RESPONSE = jdumps({
+    "name": "Unsafe Browser MCP Server",
+    "version": "2.0.0",
+    "protocol": "MCP over HTTP",
+    "description": "Browser automation with SSL bypass",
+    "endpoints": {
+        "info": "GET /",
+        "health": "GET /health",
+        "tools": "GET /tools",
+        "call": "POST /call/{tool_name}",
+        "batch_call": "POST /batch_call",
+        "call_batch": "POST /call/batch",
+        "navigate": "POST /api/navigate",
+        "click": "POST /api/click",
+        "fill": "POST /api/fill",
+        "screenshot": "POST /api/screenshot",
+        "screenshot_stream": "POST /api/screenshot/stream",
+        "screenshot_file": "GET /screenshots/{filename}"
+    },
+    "documentation": "/docs"
+}).encode()
+
+# Only the timestamp changes between health checks
+HEALTH_RESPONSE = b'{"status":"healthy","timestamp":"%s","service":"unsafe-browser-mcp"}'
+
 @app.get("/")
 async def root():
     """API information"""
-    return {
-        "name": "Unsafe Browser MCP Server",
-        "version": "2.0.0",
-        "protocol": "MCP over HTTP",
-        "description": "Browser automation with SSL bypass",
-        "endpoints": {
-            "info": "GET /",
-            "health": "GET /health",
-            "tools": "GET /tools",
-            "call": "POST /call/{tool_name}",
-            "navigate": "POST /api/navigate",
-            "click": "POST /api/click",
-            "fill": "POST /api/fill",
-            "screenshot": "POST /api/screenshot"
-        },
-        "documentation": "/docs"
-    }
+    return Response(content=ROOT_RESPONSE, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "service": "unsafe-browser-mcp"
-    }
+    body = HEALTH_RESPONSE % datetime.now().isoformat().encode()
+    return Response(content=body, media_type="application/json")
+
+# The tool set is fixed for the life of the process: serialize the listing once
+TOOLS_RESPONSE = jdumps({
+    "tools": [
+        {
+            "name": t.name,
+            "description": t.description,
+            "inputSchema": t.inputSchema
+        }
+        for t in TOOL_LIST
+    ],
+    "count": len(TOOL_LIST)
+}).encode()
 
 @app.get("/tools")
 async def list_tools():
     """List all available MCP tools"""
-    try:
-        tools = await mcp_app.list_tools()
-        return {
-            "tools": [
-                {
-                    "name": t.name,
-                    "description": t.description,
-                    "inputSchema": t.inputSchema
-                }
-                for t in tools
-            ],
-            "count": len(tools)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=TOOLS_RESPONSE, media_type="application/json")
+
+async def dispatch(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one MCP tool and convert its content items to JSON-friendly dicts"""
+    result = await run_mcp_tool(tool_name, arguments)
+    
+    # Convert TextContent to dict
+    response_data = []
+    for item in result:
+        if hasattr(item, 'text'):
+            text = item.text
+            # Only text that looks like a JSON object/array is parsed; the rest skips the exception path
+            if text.lstrip()[:1] in ("{", "["):
+                try:
+                    response_data.append(jloads(text))
+                    continue
+                except ValueError:  # json/orjson JSONDecodeError
+                    pass
+            # Return as plain text
+            response_data.append({"text": text})
+        elif hasattr(item, 'data'):
+            # Image content
+            response_data.append({
+                "type": "image",
+                "data": item.data,
+                "mimeType": item.mimeType
+            })
+    
+    return {
+        "success": True,
+        "tool": tool_name,
+        "result": response_data
+    }
+
+# Registered before /call/{tool_name} so "batch" isn't taken as a tool name
+@app.post("/call/batch")
+async def call_batch(calls: List[ToolCall]):
+    """
+    Same as POST /batch_call, with the calls as a bare JSON list
+    
+    Example:
+    POST /call/batch
+    [{"tool": "browser_navigate", "arguments": {"url": "https://example.com"}}]
+    """
+    return await batch_call(BatchCallRequest(calls=calls))
 
 @app.post("/call/{tool_name}")
 async def call_tool(tool_name: str, request: ToolCallRequest):
@@ -114,35 +184,53 @@ async def call_tool(tool_name: str, request: ToolCallRequest):
     {"arguments": {"url": "https://example.com"}}
     """
     try:
-        result = await mcp_app.call_tool(tool_name, request.arguments)
-        
-        # Convert TextContent to dict
-        response_data = []
-        for item in result:
-            if hasattr(item, 'text'):
-                try:
-                    # Try to parse as JSON
-                    parsed = json.loads(item.text)
-                    response_data.append(parsed)
-                except:
-                    # Return as plain text
-                    response_data.append({"text": item.text})
-            elif hasattr(item, 'data'):
-                # Image content
-                response_data.append({
-                    "type": "image",
-                    "data": item.data,
-                    "mimeType": item.mimeType
-                })
-        
-        return {
-            "success": True,
-            "tool": tool_name,
-            "result": response_data
-        }
+        return await dispatch(tool_name, request.arguments)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/batch_call")
+async def batch_call(request: BatchCallRequest):
+    """
+    Call several MCP tools in one request
+    
+    Browser tools share one page, so they run in the given order; other
+    tools (fetch_*, download_file, ...) run concurrently alongside them.
+    Results are returned in request order.
+    
+    Example:
+    POST /batch_call
+    {"calls": [{"tool": "browser_navigate", "arguments": {"url": "https://example.com"}},
+               {"tool": "browser_screenshot", "arguments": {}}]}
+    """
+    calls = request.calls
+    
+    async def _run(call: ToolCall) -> Dict[str, Any]:
+        try:
+            return await dispatch(call.tool, call.arguments)
+        except Exception as e:
+            return {"success": False, "tool": call.tool, "error": str(e)}
+    
+    async def _run_in_order(indexed):
+        return [(i, await _run(call)) for i, call in indexed]
+    
+    async def _run_one(i, call):
+        return [(i, await _run(call))]
+    
+    browser_calls = [(i, c) for i, c in enumerate(calls) if c.tool.startswith("browser_")]
+    other_calls = [(i, c) for i, c in enumerate(calls) if not c.tool.startswith("browser_")]
+    
+    groups = await asyncio.gather(
+        _run_in_order(browser_calls),
+        *(_run_one(i, c) for i, c in other_calls)
+    )
+    
+    results = [None] * len(calls)
+    for group in groups:
+        for i, r in group:
+            results[i] = r
+    
+    return {"success": True, "results": results, "count": len(results)}
+
 # ============================================================================
 # CONVENIENT API ENDPOINTS
 # ============================================================================
@@ -174,14 +262,20 @@ async def screenshot(request: ScreenshotRequest):
     browser = await get_browser()
     result = await browser.screenshot(request.filename, request.full_page)
     
+    if result["success"] and not request.inline:
+        # Raw PNG is served by GET /screenshots/{filename}, which only looks at the basename
+        return {
+            "success": True,
+            "filename": request.filename,
+            "url": f"/screenshots/{os.path.basename(request.filename)}",
+            "mimeType": "image/png"
+        }
+    
     if result["success"]:
         # Read and return screenshot as base64
-        import base64
-        import os
         filepath = os.path.join(browser.screenshot_dir, request.filename)
         try:
-            with open(filepath, "rb") as f:
-                img_data = base64.b64encode(f.read()).decode()
+            img_data = await asyncio.to_thread(read_base64, filepath)
             return {
                 "success": True,
                 "filename": request.filename,
@@ -192,11 +286,32 @@ async def screenshot(request: ScreenshotRequest):
             return result
     return result
 
+@app.post("/api/screenshot/stream")
+async def screenshot_stream(request: ScreenshotRequest):
+    """Take a screenshot and stream the PNG itself as the response body"""
+    browser = await get_browser()
+    result = await browser.screenshot(request.filename, request.full_page)
+    if not result["success"]:
+        # Success is image/png, so failure is signalled by status rather than a 200 JSON body
+        raise HTTPException(status_code=500, detail=result.get("error", "Screenshot failed"))
+    # FileResponse sends the file in chunks, so neither the PNG nor a base64 copy is held in memory
+    return FileResponse(os.path.join(browser.screenshot_dir, request.filename), media_type="image/png")
+
+@app.get("/screenshots/{filename}")
+async def screenshot_file(filename: str):
+    """Serve a saved screenshot as image/png"""
+    # Only the directory is needed, so don't launch the browser for it
+    from enhanced_browser_mcp import SCREENSHOT_DIR
+    filepath = os.path.join(SCREENSHOT_DIR, os.path.basename(filename))
+    if not os.path.isfile(filepath):
+        raise HTTPException(status_code=404, detail=f"Screenshot not found: {filename}")
+    return FileResponse(filepath, media_type="image/png")
+
 @app.post("/api/fetch")
 async def fetch_url(request: Dict[str, str]):
     """Fetch a URL"""
     fetcher = await get_fetcher()
-    result = await fetcher.fetch(request["url"])
+    result = await fetcher.fetch(request["url"], include_headers=True, max_bytes=4 * 1000)
     
     # Truncate content
     if result.get("success") and "content" in result:
@@ -209,23 +324,7 @@ async def fetch_url(request: Dict[str, str]):
 async def list_sessions():
     """List all saved sessions"""
     browser = await get_browser()
-    sessions = browser.session_manager.list_sessions()
-    
-    session_details = []
-    for s in sessions:
-        try:
-            import os
-            session_path = os.path.join(browser.session_manager.session_dir, f"{s}.json")
-            with open(session_path, 'r') as f:
-                data = json.load(f)
-            session_details.append({
-                "name": s,
-                "cookie_count": data.get("cookie_count", 0),
-                "url": data.get("current_url", "N/A"),
-                "saved_at": data.get("saved_at", "N/A")
-            })
-        except:
-            session_details.append({"name": s})
+    session_details = await list_session_summaries(browser)
     
     return {"sessions": session_details, "count": len(session_details)}
 
@@ -273,5 +372,14 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        log_level="info",
+        # uvloop/httptools when installed; UVICORN_LOOP=asyncio / UVICORN_HTTP=h11 for debugging
+        loop=os.getenv("UVICORN_LOOP", "auto"),
+        http=os.getenv("UVICORN_HTTP", "auto"),
+        # Single worker on purpose: the browser page and sessions live in this process,
+        # so extra workers would each drive a different browser
+        limit_concurrency=int(os.getenv("UVICORN_LIMIT_CONCURRENCY", "1024")),
+        backlog=2048,
+        # Per-request access lines cost a logging call each; UVICORN_ACCESS_LOG=1 to turn them on
+        access_log=os.getenv("UVICORN_ACCESS_LOG") == "1"
     )
@@ -4,14 +4,26 @@ Ollama Bridge for Unsafe Browser MCP
 Connects Ollama to browser automation tools
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
 import sys
+from typing import Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speedup, stdlib json is the fallback
+    _loads = json.loads
 
 # Configuration
 OLLAMA_URL = "http://localhost:11434/api/chat"
 MCP_URL = "http://localhost:8000"
 
+# One HTTP session for Ollama and the MCP server, reused across turns
+# (created lazily inside the event loop, closed by run())
+_session: Optional[aiohttp.ClientSession] = None
+
 # Tool definitions for Ollama
 TOOLS = [
     {
@@ -73,20 +85,52 @@ TOOLS = [
 ]
 
 
-def execute_tool(tool_name, arguments):
+async def get_session() -> aiohttp.ClientSession:
+    """Get or create the shared aiohttp session (keep-alive pool for Ollama and MCP)"""
+    global _session
+    if _session is None:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, enable_cleanup_closed=True),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    return _session
+
+
+async def close_session():
+    """Close the shared session"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def execute_tool(tool_name, arguments):
     """Execute MCP tool"""
     try:
-        response = requests.post(
+        session = await get_session()
+        async with session.post(
             f"{MCP_URL}/call/{tool_name}",
-            json={"arguments": arguments},
-            timeout=30
-        )
-        return response.json()
+            json={"arguments": arguments}
+        ) as response:
+            return await response.json(loads=_loads)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def chat_with_browser(prompt, model="mistral", verbose=True):
+async def execute_tools(calls):
+    """Execute several MCP tools with a single /batch_call request"""
+    try:
+        session = await get_session()
+        async with session.post(
+            f"{MCP_URL}/batch_call",
+            json={"calls": [{"tool": name, "arguments": args} for name, args in calls]}
+        ) as response:
+            return (await response.json(loads=_loads))["results"]
+    except Exception as e:
+        return [{"success": False, "error": str(e)} for _ in calls]
+
+
+async def chat_with_browser(prompt, model="mistral", verbose=True):
     """
     Chat with Ollama using browser tools
     
@@ -105,7 +149,8 @@ def chat_with_browser(prompt, model="mistral", verbose=True):
     
     try:
         # Call Ollama
-        response = requests.post(
+        session = await get_session()
+        async with session.post(
             OLLAMA_URL,
             json={
                 "model": model,
@@ -113,18 +158,18 @@ def chat_with_browser(prompt, model="mistral", verbose=True):
                 "tools": TOOLS,
                 "stream": False
             },
-            timeout=120
-        )
-        
-        if response.status_code != 200:
-            return {"error": f"Ollama error: {response.status_code}"}
+            timeout=aiohttp.ClientTimeout(total=120)
+        ) as response:
+            if response.status != 200:
+                return {"error": f"Ollama error: {response.status}"}
+            
+            result = await response.json(loads=_loads)
         
-        result = response.json()
         message = result["message"]
         
         # Check for tool calls
         if "tool_calls" in message:
-            results = []
+            calls = []
             
             for tool_call in message["tool_calls"]:
                 function = tool_call["function"]
@@ -133,15 +178,22 @@ def chat_with_browser(prompt, model="mistral", verbose=True):
                 
                 # Parse arguments if string
                 if isinstance(arguments, str):
-                    arguments = json.loads(arguments)
+                    arguments = _loads(arguments)
                 
                 if verbose:
                     print(f"\n🔧 Calling: {function_name}")
                     print(f"📋 Args: {json.dumps(arguments, indent=2)}")
                 
-                # Execute via MCP
-                tool_result = execute_tool(function_name, arguments)
-                
+                calls.append((function_name, arguments))
+            
+            # Execute all tool calls in one MCP round-trip (browser calls keep their order)
+            if len(calls) > 1:
+                tool_results = await execute_tools(calls)
+            else:
+                tool_results = [await execute_tool(*calls[0])]
+            
+            results = []
+            for (function_name, arguments), tool_result in zip(calls, tool_results):
                 if verbose:
                     print(f"✅ Result: {json.dumps(tool_result, indent=2)[:200]}...")
                 
@@ -160,7 +212,7 @@ def chat_with_browser(prompt, model="mistral", verbose=True):
         return {"error": str(e)}
 
 
-def interactive_mode(model="mistral"):
+async def interactive_mode(model="mistral"):
     """Interactive chat"""
     print("="*70)
     print(f"🤖 Ollama ({model}) + Browser Automation")
@@ -189,7 +241,7 @@ def interactive_mode(model="mistral"):
             if not user_input:
                 continue
             
-            result = chat_with_browser(user_input, model=current_model)
+            result = await chat_with_browser(user_input, model=current_model)
             
             if isinstance(result, dict) and result.get("type") == "text":
                 print(f"\n🤖 {current_model}: {result['content']}")
@@ -203,48 +255,59 @@ def interactive_mode(model="mistral"):
             print(f"\n❌ Error: {e}")
 
 
-def main():
-    """Main entry point"""
-    
-    # Check MCP server
-    try:
-        requests.get(f"{MCP_URL}/health", timeout=2)
-        print("✅ MCP Server is running")
-    except:
-        print("❌ MCP Server is not running!")
-        print("   Start it with: python mcp_server_http.py")
-        sys.exit(1)
-    
-    # Check Ollama
+async def run(args):
+    """Check both services, run a prompt or the interactive loop, then close the session"""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
-        models = response.json().get("models", [])
-        print(f"✅ Ollama is running ({len(models)} models available)")
-        if models:
-            print(f"   Available models: {', '.join([m['name'] for m in models[:5]])}")
-    except:
-        print("❌ Ollama is not running!")
-        print("   Start it with: ollama serve")
-        sys.exit(1)
-    
-    print()
-    
-    # Command line or interactive
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '-m' and len(sys.argv) > 3:
-            # Model specified: python ollama_bridge.py -m llama3.1 "your prompt"
-            model = sys.argv[2]
-            prompt = " ".join(sys.argv[3:])
-            result = chat_with_browser(prompt, model=model)
-            print(json.dumps(result, indent=2))
+        session = await get_session()
+        quick = aiohttp.ClientTimeout(total=2)
+        
+        # Check MCP server
+        try:
+            async with session.get(f"{MCP_URL}/health", timeout=quick):
+                pass
+            print("✅ MCP Server is running")
+        except Exception:
+            print("❌ MCP Server is not running!")
+            print("   Start it with: python mcp_server_http.py")
+            sys.exit(1)
+        
+        # Check Ollama
+        try:
+            async with session.get("http://localhost:11434/api/tags", timeout=quick) as response:
+                models = (await response.json(loads=_loads)).get("models", [])
+            print(f"✅ Ollama is running ({len(models)} models available)")
+            if models:
+                print(f"   Available models: {', '.join([m['name'] for m in models[:5]])}")
+        except Exception:
+            print("❌ Ollama is not running!")
+            print("   Start it with: ollama serve")
+            sys.exit(1)
+        
+        print()
+        
+        # Command line or interactive
+        if args:
+            if args[0] == '-m' and len(args) > 2:
+                # Model specified: python ollama_bridge.py -m llama3.1 "your prompt"
+                model = args[1]
+                prompt = " ".join(args[2:])
+                result = await chat_with_browser(prompt, model=model)
+                print(json.dumps(result, indent=2))
+            else:
+                # Just prompt: python ollama_bridge.py "your prompt"
+                prompt = " ".join(args)
+                result = await chat_with_browser(prompt)
+                print(json.dumps(result, indent=2))
         else:
-            # Just prompt: python ollama_bridge.py "your prompt"
-            prompt = " ".join(sys.argv[1:])
-            result = chat_with_browser(prompt)
-            print(json.dumps(result, indent=2))
-    else:
-        # Interactive mode
-        interactive_mode()
+            # Interactive mode
+            await interactive_mode()
+    finally:
+        await close_session()
+
+
+def main():
+    """Main entry point"""
+    asyncio.run(run(sys.argv[1:]))
 
 
 if __name__ == "__main__":
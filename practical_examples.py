@@ -7,6 +7,9 @@ Ready-to-use scripts for common scenarios
 import ssl
 import urllib.request
 import json
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 class UnsafeHTTPSFetcher:
@@ -17,8 +20,8 @@ class UnsafeHTTPSFetcher:
         self.ssl_context.check_hostname = False
         self.ssl_context.verify_mode = ssl.CERT_NONE
     
-    def fetch(self, url, headers=None):
-        """Fetch URL with SSL bypass"""
+    def open(self, url, headers=None):
+        """Open URL with SSL bypass (caller closes the response)"""
         req = urllib.request.Request(url)
         req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
         
@@ -26,15 +29,20 @@ class UnsafeHTTPSFetcher:
             for key, value in headers.items():
                 req.add_header(key, value)
         
+        return urllib.request.urlopen(req, context=self.ssl_context, timeout=30)
+    
+    def fetch(self, url, headers=None, decode=True):
+        """Fetch URL with SSL bypass (decode=False: status/headers only, body is not read)"""
         try:
-            with urllib.request.urlopen(req, context=self.ssl_context, timeout=30) as response:
-                content = response.read().decode('utf-8')
-                return {
+            with self.open(url, headers) as response:
+                result = {
                     "success": True,
                     "status": response.status,
-                    "content": content,
                     "headers": dict(response.headers)
                 }
+                if decode:
+                    result["content"] = response.read().decode('utf-8')
+                return result
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -44,11 +52,22 @@ class UnsafeHTTPSFetcher:
         if result["success"]:
             try:
                 result["json"] = json.loads(result["content"])
-            except:
+            except json.JSONDecodeError:
                 pass
         return result
 
 
+# One fetcher (and SSL context) shared by every example; building a context loads the trust store
+FETCHER = UnsafeHTTPSFetcher()
+
+
+def run_concurrently(func, items):
+    """Call func on every item in parallel threads (the work is network-bound), results in input order"""
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(items)))) as pool:
+        return list(pool.map(func, items))
+
+
 # ============================================================================
 # EXAMPLE 1: Check Internal API Status
 # ============================================================================
@@ -59,7 +78,7 @@ def check_api_health():
     print("EXAMPLE 1: API Health Check")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     # Your internal API endpoint
     api_url = "https://your-internal-api.local/health"
@@ -87,7 +106,7 @@ def fetch_from_multiple_services():
     print("EXAMPLE 2: Multi-Service Data Collection")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     services = {
         "Users API": "https://users-api.internal/v1/count",
@@ -97,10 +116,11 @@ def fetch_from_multiple_services():
     
     results = {}
     
-    for name, url in services.items():
-        print(f"\nFetching from {name}...")
-        result = fetcher.fetch_json(url)
-        
+    print(f"\nFetching from {', '.join(services)}...")
+    fetched = run_concurrently(fetcher.fetch_json, services.values())
+    
+    for name, result in zip(services, fetched):
+        print(f"\n{name}:")
         if result["success"]:
             print(f"  ✅ Success")
             results[name] = result.get("json", result["content"][:100])
@@ -125,7 +145,7 @@ def monitor_service_with_alerts(url, check_interval=60, max_checks=10):
     print("EXAMPLE 3: Service Monitoring")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     print(f"\nMonitoring: {url}")
     print(f"Check interval: {check_interval} seconds")
@@ -136,7 +156,7 @@ def monitor_service_with_alerts(url, check_interval=60, max_checks=10):
     
     for i in range(max_checks):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        result = fetcher.fetch(url)
+        result = fetcher.fetch(url, decode=False)
         
         if result["success"]:
             print(f"[{timestamp}] ✅ Check {i+1}/{max_checks} - Service UP (Status: {result['status']})")
@@ -169,25 +189,25 @@ def test_api_authentication():
     print("EXAMPLE 4: API Authentication Testing")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     api_url = "https://api.internal/protected"
     
     # Test 1: No authentication
     print("\n1. Testing without authentication...")
-    result = fetcher.fetch(api_url)
+    result = fetcher.fetch(api_url, decode=False)
     print(f"   Status: {result.get('status', 'Failed')}")
     
     # Test 2: Bearer token
     print("\n2. Testing with Bearer token...")
     headers = {"Authorization": "Bearer your-token-here"}
-    result = fetcher.fetch(api_url, headers=headers)
+    result = fetcher.fetch(api_url, headers=headers, decode=False)
     print(f"   Status: {result.get('status', 'Failed')}")
     
     # Test 3: API Key
     print("\n3. Testing with API key...")
     headers = {"X-API-Key": "your-api-key-here"}
-    result = fetcher.fetch(api_url, headers=headers)
+    result = fetcher.fetch(api_url, headers=headers, decode=False)
     print(f"   Status: {result.get('status', 'Failed')}")
     
     # Test 4: Basic Auth (in header)
@@ -195,7 +215,7 @@ def test_api_authentication():
     import base64
     credentials = base64.b64encode(b"username:password").decode()
     headers = {"Authorization": f"Basic {credentials}"}
-    result = fetcher.fetch(api_url, headers=headers)
+    result = fetcher.fetch(api_url, headers=headers, decode=False)
     print(f"   Status: {result.get('status', 'Failed')}")
 
 
@@ -203,13 +223,16 @@ def test_api_authentication():
 # EXAMPLE 5: Scrape Internal Dashboard
 # ============================================================================
 
+# Title, links and forms in one pass over the page
+_DASHBOARD_RE = re.compile(r"<title>(.*?)</title>|<a\s|<form", re.IGNORECASE | re.DOTALL)
+
 def scrape_internal_dashboard():
     """Scrape data from internal HTML dashboard"""
     print("\n" + "="*70)
     print("EXAMPLE 5: Dashboard Scraping")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     dashboard_url = "https://dashboard.internal"
     
@@ -222,16 +245,22 @@ def scrape_internal_dashboard():
         # Simple text extraction (for demo - use BeautifulSoup for real scraping)
         print("\n📊 Dashboard Content:")
         
-        # Extract title
-        if "<title>" in html:
-            start = html.find("<title>") + 7
-            end = html.find("</title>")
-            title = html[start:end]
-            print(f"   Title: {title}")
+        # Extract title and count certain elements (example)
+        title = None
+        links = forms = 0
+        for match in _DASHBOARD_RE.finditer(html):
+            if match.group(1) is not None:
+                if title is None:
+                    title = match.group(1)
+            elif match.group(0)[1] in "aA":
+                links += 1
+            else:
+                forms += 1
         
-        # Count certain elements (example)
-        print(f"   Links found: {html.count('<a ')}")
-        print(f"   Forms found: {html.count('<form')}")
+        if title is not None:
+            print(f"   Title: {title}")
+        print(f"   Links found: {links}")
+        print(f"   Forms found: {forms}")
         print(f"   Content size: {len(html)} bytes")
         
         # You can use BeautifulSoup for more advanced parsing:
@@ -252,7 +281,7 @@ def batch_download_reports():
     print("EXAMPLE 6: Batch File Download")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     files = {
         "daily_report.pdf": "https://reports.internal/daily/2024-01-01.pdf",
@@ -260,29 +289,25 @@ def batch_download_reports():
         "monthly_stats.csv": "https://reports.internal/monthly/stats.csv"
     }
     
-    for filename, url in files.items():
-        print(f"\nDownloading: {filename}")
-        print(f"  From: {url}")
-        
-        # Create request
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0')
+    def download(item):
+        filename, url = item
         
         try:
-            # Create SSL context
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-                data = response.read()
-                
-                with open(filename, 'wb') as f:
-                    f.write(data)
+            # Stream straight to disk in 64 KB chunks instead of buffering the whole file
+            with fetcher.open(url) as response, open(filename, 'wb') as f:
+                shutil.copyfileobj(response, f, 64 * 1024)
                 
-                print(f"  ✅ Downloaded {len(data)} bytes")
+                return f"  ✅ Downloaded {f.tell()} bytes"
         except Exception as e:
-            print(f"  ❌ Failed: {e}")
+            return f"  ❌ Failed: {e}"
+    
+    # All downloads run at once; output is printed afterwards in list order
+    outcomes = run_concurrently(download, files.items())
+    
+    for (filename, url), outcome in zip(files.items(), outcomes):
+        print(f"\nDownloading: {filename}")
+        print(f"  From: {url}")
+        print(outcome)
 
 
 # ============================================================================
@@ -295,7 +320,7 @@ def compare_api_environments():
     print("EXAMPLE 7: Environment Comparison")
     print("="*70)
     
-    fetcher = UnsafeHTTPSFetcher()
+    fetcher = FETCHER
     
     environments = {
         "Dev": "https://api-dev.internal/config",
@@ -305,10 +330,11 @@ def compare_api_environments():
     
     responses = {}
     
-    for env, url in environments.items():
-        print(f"\nFetching {env} config...")
-        result = fetcher.fetch_json(url)
-        
+    print(f"\nFetching {', '.join(environments)} configs...")
+    fetched = run_concurrently(fetcher.fetch_json, environments.values())
+    
+    for env, result in zip(environments, fetched):
+        print(f"\n{env}:")
         if result["success"] and "json" in result:
             responses[env] = result["json"]
             print(f"  ✅ Success")
@@ -5,60 +5,190 @@ Fixed paths for Docker volume mounting
 """
 
 import ssl
-import urllib.request
-import urllib.error
+import codecs
 import json
 import os
-from typing import Dict, Any
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import urllib3
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+# Verification is off on purpose; don't warn about it on every request
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Process-local DNS cache: new connections to a host we've already resolved skip the resolver
+DNS_TTL = 300
+DNS_CACHE_SIZE = 1024
+_dns_cache: Dict[tuple, tuple] = {}
+# fetch_many resolves from several threads at once
+_dns_lock = threading.Lock()
+_system_getaddrinfo = socket.getaddrinfo
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    """socket.getaddrinfo with a DNS_TTL-second cache (failures are not cached)"""
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    with _dns_lock:
+        entry = _dns_cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    # Resolved outside the lock so one slow lookup doesn't stall the other threads
+    result = _system_getaddrinfo(host, port, *args, **kwargs)
+    with _dns_lock:
+        if key not in _dns_cache and len(_dns_cache) >= DNS_CACHE_SIZE:
+            # Oldest insertion goes first
+            _dns_cache.pop(next(iter(_dns_cache)))
+        _dns_cache[key] = (result, now + DNS_TTL)
+    return result
+
+socket.getaddrinfo = _cached_getaddrinfo
+
+# Shared by every fetcher. Built directly instead of via create_default_context():
+# with CERT_NONE the system CA bundle would be loaded only to go unused.
+_UNSAFE_SSL_CONTEXT = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+_UNSAFE_SSL_CONTEXT.check_hostname = False
+_UNSAFE_SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+_UNSAFE_SSL_CONTEXT.set_alpn_protocols(['http/1.1'])
+
+# fetch_json's ETag cache is bounded by total body bytes; larger bodies aren't cached
+ETAG_CACHE_BYTES = 16 * 1024 * 1024
+ETAG_CACHE_MAX_BODY = 1024 * 1024
+
+# Content types whose bodies are decoded to text; anything else is returned as bytes
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/xml', 'application/javascript')
+TEXT_CONTENT_SUFFIXES = ('+json', '+xml')
+
+def _parse_content_type(value: str) -> tuple:
+    """('text/html', 'utf-8') from a Content-Type header value (charset None if absent)"""
+    mime, *params = value.split(';')
+    charset = None
+    for param in params:
+        key, _, val = param.strip().partition('=')
+        if key.lower() == 'charset':
+            charset = val.strip('"\' ') or None
+    return mime.strip().lower(), charset
+
+def _decode_body(content: bytes, charset: Optional[str], truncated: bool) -> str:
+    """Decode with the declared charset (UTF-8 if none or unknown)"""
+    encoding = charset or 'utf-8'
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'utf-8'
+    if truncated:
+        # The cut may land inside a multi-byte character
+        return content.decode(encoding, errors='replace')
+    try:
+        return content.decode(encoding)
+    except UnicodeDecodeError:
+        return content.decode('latin-1', errors='ignore')
 
 class UnsafeHTTPSFetcher:
     """Fetch HTTPS content with certificate verification disabled"""
     
-    def __init__(self):
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        self.ssl_context = _UNSAFE_SSL_CONTEXT
         self.download_dir = "/app/downloads"
+        # fetch() refuses bodies larger than this instead of buffering them (downloads stream to disk)
+        self.max_size = max_size
+        # (url, request headers) -> (ETag, body bytes) for conditional re-fetches in fetch_json
+        # Least recently used first; _etag_bytes is the sum of the cached body sizes
+        self._etag_cache: Dict[tuple, tuple] = OrderedDict()
+        self._etag_bytes = 0
+        self._etag_lock = threading.Lock()
+        # Keep-alive connections per host: repeat fetches skip the TCP + TLS handshake.
+        # HTTP/1.1 only, so fetch_many to one host uses up to maxsize parallel
+        # connections rather than one multiplexed HTTP/2 connection.
+        # No retries (same as urlopen), but redirects are still followed.
+        self._pool = urllib3.PoolManager(
+            num_pools=16,
+            maxsize=16,
+            cert_reqs='CERT_NONE',
+            assert_hostname=False,
+            ssl_context=self.ssl_context,
+            retries=urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=10)
+        )
+    
+    def _open(self, url: str, headers: Optional[Dict[str, str]], user_agent: str, timeout: float):
+        """Start a GET on the shared pool; the body is left unread"""
+        request_headers = {'User-Agent': user_agent}
+        if headers:
+            request_headers.update(headers)
+        return self._pool.request('GET', url, headers=request_headers, timeout=timeout, preload_content=False)
     
-    def fetch(self, url: str, headers: Dict[str, str] = None) -> Dict[str, Any]:
-        """Fetch URL with SSL verification disabled"""
+    def fetch(self, url: str, headers: Dict[str, str] = None, max_bytes: Optional[int] = None,
+              decode: bool = True) -> Dict[str, Any]:
+        """Fetch URL with SSL verification disabled (max_bytes reads only a prefix; decode=False keeps bytes only)"""
         try:
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
-            
-            if headers:
-                for key, value in headers.items():
-                    req.add_header(key, value)
-            
-            with urllib.request.urlopen(req, context=self.ssl_context, timeout=30) as response:
-                content = response.read()
+            response = self._open(url, headers, 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)', 30)
+            complete = False
+            try:
+                if response.status >= 400:
+                    response.drain_conn()
+                    complete = True
+                    return {
+                        "success": False,
+                        "error": f"HTTP Error {response.status}: {response.reason}",
+                        "url": url
+                    }
                 
-                try:
-                    text_content = content.decode('utf-8')
-                except UnicodeDecodeError:
-                    text_content = content.decode('latin-1', errors='ignore')
+                if max_bytes is None:
+                    length = response.headers.get('Content-Length')
+                    if length and length.isdigit() and int(length) > self.max_size:
+                        return self._too_large(url, f"{length} bytes")
+                    # Capped read: a missing or lying Content-Length can't make us buffer more than max_size
+                    content = response.read(self.max_size + 1)
+                    if len(content) > self.max_size:
+                        return self._too_large(url, f"over {self.max_size} bytes")
+                    truncated = False
+                else:
+                    # One extra byte tells us whether anything was cut off
+                    content = response.read(max_bytes + 1)
+                    truncated = len(content) > max_bytes
+                    content = content[:max_bytes]
+                complete = not truncated
                 
-                return {
+                # Binary bodies (PDFs, images, ...) skip the decode entirely
+                mime, charset = _parse_content_type(response.headers.get('Content-Type', ''))
+                is_text = not mime or mime.startswith(TEXT_CONTENT_TYPES) or mime.endswith(TEXT_CONTENT_SUFFIXES)
+                text_content = _decode_body(content, charset, truncated) if is_text and decode else None
+                
+                result = {
                     "success": True,
-                    "url": response.url,
+                    "url": response.geturl() or url,
                     "status": response.status,
-                    "headers": dict(response.headers),
+                    # urllib3's case-insensitive HTTPHeaderDict, not copied per response;
+                    # callers that JSON-encode the result convert it with dict(headers.itermerged())
+                    "headers": response.headers,
                     "content": text_content,
                     "size": len(content),
                     "certificate": "⚠️ Certificate verification DISABLED"
                 }
+                if text_content is None:
+                    result["content_bytes"] = content
+                if truncated:
+                    result["truncated"] = True
+                return result
+            finally:
+                # A fully read connection goes back to the pool; a cut-off one is dropped
+                if complete:
+                    response.release_conn()
+                else:
+                    response.close()
         
-        except urllib.error.HTTPError as e:
-            return {
-                "success": False,
-                "error": f"HTTP Error {e.code}: {e.reason}",
-                "url": url
-            }
-        
-        except urllib.error.URLError as e:
+        except urllib3.exceptions.HTTPError as e:
             return {
                 "success": False,
-                "error": f"URL Error: {str(e.reason)}",
+                "error": f"URL Error: {str(getattr(e, 'reason', None) or e)}",
                 "url": url
             }
         
@@ -69,15 +199,65 @@ class UnsafeHTTPSFetcher:
                 "url": url
             }
     
+    def _too_large(self, url: str, size: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"Response too large: {size} (max {self.max_size}); use download instead",
+            "url": url
+        }
+    
+    def fetch_many(self, urls: List[str], headers: Dict[str, str] = None) -> List[Dict[str, Any]]:
+        """Fetch several URLs concurrently over the shared pool, results in input order"""
+        urls = list(urls)
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(16, len(urls))) as executor:
+            return list(executor.map(lambda url: self.fetch(url, headers), urls))
+    
     def fetch_json(self, url: str, headers: Dict[str, str] = None) -> Dict[str, Any]:
-        """Fetch and parse JSON response"""
-        result = self.fetch(url, headers)
+        """Fetch and parse JSON response (repeat fetches send If-None-Match and skip the download on 304)"""
+        # Keyed on the request headers too, so a different Authorization/Cookie never
+        # revalidates against (or is served) another caller's cached body
+        sent = {k: v for k, v in (headers or {}).items() if k.lower() != 'if-none-match'}
+        key = (url, tuple(sorted((k.lower(), v) for k, v in sent.items())))
+        cached = None
+        if len(sent) == len(headers or {}):  # caller didn't send their own If-None-Match
+            with self._etag_lock:
+                cached = self._etag_cache.get(key)
+                if cached is not None:
+                    self._etag_cache.move_to_end(key)
+            if cached is not None:
+                headers = {**sent, 'If-None-Match': cached[0]}
+        
+        # The body is parsed straight from bytes, so it is never decoded to str
+        result = self.fetch(url, headers, decode=False)
         
         if result["success"]:
+            not_modified = result["status"] == 304 and cached is not None
+            body = cached[1] if not_modified else result["content_bytes"]
             try:
-                result["json"] = json.loads(result["content"])
-            except json.JSONDecodeError as e:
+                # Parsed per call (from the cached bytes on 304), so callers never share one object
+                result["json"] = orjson.loads(body) if orjson is not None else json.loads(body)
+            except ValueError as e:  # json/orjson JSONDecodeError
                 result["json_error"] = str(e)
+                return result
+            
+            if not_modified:
+                result["not_modified"] = True
+                return result
+            
+            etag = result["headers"].get('ETag')
+            with self._etag_lock:
+                # A fresh body always replaces what was cached for this key
+                old = self._etag_cache.pop(key, None)
+                if old is not None:
+                    self._etag_bytes -= len(old[1])
+                if etag and len(body) <= ETAG_CACHE_MAX_BODY:
+                    self._etag_cache[key] = (etag, body)
+                    self._etag_bytes += len(body)
+                    while self._etag_bytes > ETAG_CACHE_BYTES:
+                        _, (_, evicted) = self._etag_cache.popitem(last=False)
+                        self._etag_bytes -= len(evicted)
         
         return result
     
@@ -90,22 +270,42 @@ class UnsafeHTTPSFetcher:
             else:
                 filepath = filename
                 
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0')
-            
-            with urllib.request.urlopen(req, context=self.ssl_context, timeout=60) as response:
-                data = response.read()
+            response = self._open(url, None, 'Mozilla/5.0', 60)
+            try:
+                if response.status >= 400:
+                    response.drain_conn()
+                    return {
+                        "success": False,
+                        "error": f"HTTP Error {response.status}: {response.reason}",
+                        "url": url
+                    }
                 
-                with open(filepath, 'wb') as f:
-                    f.write(data)
+                # Write 64 KB chunks as they arrive instead of holding the whole file in memory
+                total = 0
+                opened = False
+                try:
+                    with open(filepath, 'wb') as f:
+                        opened = True
+                        for chunk in response.stream(64 * 1024):
+                            f.write(chunk)
+                            total += len(chunk)
+                except BaseException:
+                    # Unread body bytes would poison the pooled connection; drop it instead,
+                    # and don't leave a truncated file behind
+                    response.close()
+                    if opened:
+                        os.remove(filepath)
+                    raise
                 
                 return {
                     "success": True,
                     "url": url,
                     "output_path": filepath,
-                    "size": len(data),
-                    "message": f"✅ Downloaded {len(data)} bytes! Check: downloads/{filename}"
+                    "size": total,
+                    "message": f"✅ Downloaded {total} bytes! Check: downloads/{filename}"
                 }
+            finally:
+                response.release_conn()
         
         except Exception as e:
             return {
@@ -113,6 +313,10 @@ class UnsafeHTTPSFetcher:
                 "error": str(e),
                 "url": url
             }
+    
+    def close(self):
+        """Close pooled connections"""
+        self._pool.clear()
 
 
 def main():
@@ -159,8 +363,11 @@ def main():
                     print(f"🔐 Certificate: {result['certificate']}")
                     print(f"📊 Status: {result['status']}")
                     print(f"📄 Size: {result['size']} bytes")
-                    print(f"\n📝 Content Preview:")
-                    print(result['content'][:500])
+                    if result['content'] is None:
+                        print(f"\n📦 Binary content ({result['headers'].get('Content-Type')}) - use download to save it")
+                    else:
+                        print(f"\n📝 Content Preview:")
+                        print(result['content'][:500])
                 else:
                     print(f"\n❌ Error: {result['error']}")
             
@@ -206,9 +413,10 @@ def main():
                     ("Wrong Host", "https://wrong.host.badssl.com/"),
                 ]
                 
-                for name, url in test_sites:
+                results = fetcher.fetch_many([url for _, url in test_sites])
+                
+                for (name, url), result in zip(test_sites, results):
                     print(f"\nTesting {name}: {url}")
-                    result = fetcher.fetch(url)
                     
                     if result["success"]:
                         print(f"  ✅ Success! Status: {result['status']}")
@@ -224,6 +432,8 @@ def main():
             break
         except Exception as e:
             print(f"\n❌ Error: {e}")
+    
+    fetcher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Shared tool schema for Unsafe Browser MCP
+One definition for the MCP server tool list and the OpenAI-format bridge TOOLS
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+# (name, description, ((param, json_schema, required), ...))
+TOOL_SPECS = (
+    # Navigation Tools
+    ("browser_navigate", "Navigate to a URL in the browser. Returns page title and status.", (
+        ("url", {"type": "string", "description": "The URL to navigate to"}, True),
+    )),
+
+    # Interaction Tools
+    ("browser_click", "Click an element on the page. Supports CSS selectors or smart keywords (login_button, username, etc.)", (
+        ("selector", {"type": "string", "description": "CSS selector or smart keyword (e.g., 'login_button', '#submit-btn')"}, True),
+    )),
+    ("browser_fill", "Fill an input field with text", (
+        ("selector", {"type": "string", "description": "CSS selector for the input field"}, True),
+        ("text", {"type": "string", "description": "Text to fill in the field"}, True),
+    )),
+    ("browser_screenshot", "Take a screenshot of the current page", (
+        ("filename", {"type": "string", "description": "Filename for the screenshot (default: screenshot.png)"}, False),
+        ("full_page", {"type": "boolean", "description": "Capture full page or just viewport (default: true)"}, False),
+    )),
+
+    # Smart Features
+    ("browser_suggest_selectors", "Get suggestions for available selectors on the page", (
+        ("element_type", {"type": "string", "description": "Element type to search for (button, input, a, etc.)"}, True),
+    )),
+
+    # Session Management
+    ("browser_save_session", "Save current browser session (cookies, URL) for later use", (
+        ("name", {"type": "string", "description": "Name for the session (default: default)"}, False),
+    )),
+    ("browser_load_session", "Load a previously saved browser session", (
+        ("name", {"type": "string", "description": "Name of the session to load"}, True),
+        ("auto_navigate", {"type": "boolean", "description": "Automatically navigate to saved URL (default: false)"}, False),
+    )),
+    ("browser_list_sessions", "List all saved browser sessions", ()),
+
+    # Network Tools
+    ("browser_network_summary", "Get summary of network activity (requests/responses)", ()),
+
+    # Fetcher Tools
+    ("fetch_url", "Fetch a URL with SSL bypass and retry logic. Returns content and metadata.", (
+        ("url", {"type": "string", "description": "URL to fetch"}, True),
+    )),
+    ("fetch_json", "Fetch and parse JSON from a URL", (
+        ("url", {"type": "string", "description": "URL to fetch JSON from"}, True),
+    )),
+    ("download_file", "Download a file from URL", (
+        ("url", {"type": "string", "description": "URL to download from"}, True),
+        ("filename", {"type": "string", "description": "Filename to save as"}, True),
+    )),
+    ("batch_fetch", "Fetch multiple URLs concurrently (10-15x faster)", (
+        ("urls", {"type": "array", "items": {"type": "string"}, "description": "List of URLs to fetch"}, True),
+    )),
+)
+
+
+def input_schema(params: Iterable[tuple]) -> Dict[str, Any]:
+    """JSON Schema object for a tool's parameters"""
+    params = tuple(params)
+    return {
+        "type": "object",
+        "properties": {name: schema for name, schema, _ in params},
+        "required": [name for name, _, required in params if required]
+    }
+
+
+def openai_tools(names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Tools in OpenAI function-calling format (all tools, or the given names in that order)"""
+    specs = {spec[0]: spec for spec in TOOL_SPECS}
+    selected = [specs[name] for name in names] if names is not None else TOOL_SPECS
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": description,
+                "parameters": input_schema(params)
+            }
+        }
+        for name, description, params in selected
+    ]
@@ -8,18 +8,53 @@ import asyncio
 import json
 import ssl
 import os
-from typing import Any, Optional
-from playwright.async_api import async_playwright, Browser, Page
+import threading
+from typing import Any, Dict, List, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+try:
+    import uvloop
+except ImportError:  # optional faster event loop (not available on Windows)
+    uvloop = None
+
+# Resource types skipped in lite mode
+LITE_BLOCKED_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+
+# Batch actions that only read the DOM; a run of them is issued concurrently
+BATCH_READ_ACTIONS = frozenset({"get_text", "get_value"})
+
+# innerText is sliced in the page, so only the kept prefix crosses over to Python
+_TEXT_PREFIX_JS = """(el, n) => {
+    const text = el.innerText;
+    return [n < 0 ? text : text.slice(0, n), text.length];
+}"""
+
+LOCATOR_CACHE_SIZE = 256
+
+# Methods callable from execute_batch
+BATCH_ACTIONS = frozenset({
+    "navigate", "click", "fill", "type_text", "press_key", "wait", "wait_for_selector",
+    "screenshot", "get_text", "get_value", "select_option", "check", "uncheck", "hover",
+    "go_back", "go_forward", "reload", "set_lite_mode",
+})
 
 class FullFeaturedBrowser:
     """Complete browser automation with SSL bypass"""
     
     def __init__(self):
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
         self.screenshot_dir = "/app/screenshots"
         self.download_dir = "/app/downloads"
+        # Cookies/localStorage carried over between CLI runs (downloads is a mounted volume)
+        self.state_file = os.path.join(self.download_dir, "browser_state.json")
+        self._init_lock = asyncio.Lock()
+        # Lite mode drops images/media/fonts/stylesheets for faster, lighter page loads
+        self.lite_mode = False
+        # selector -> Locator, so repeated actions on the same selector reuse one object
+        self._loc_cache: Dict[str, Any] = {}
         
     async def initialize(self):
         """Initialize Playwright browser"""
@@ -31,27 +66,83 @@ class FullFeaturedBrowser:
                 '--ignore-certificate-errors',
                 '--ignore-certificate-errors-spki-list',
                 '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process'
+                '--disable-features=IsolateOrigins,site-per-process',
+                # Faster startup in containers; no background fetches we never use
+                '--disable-dev-shm-usage',
+                '--no-sandbox',
+                '--disable-background-networking',
+                '--disable-sync'
             ]
         )
         
-        context = await self.browser.new_context(
+        self.context = await self.browser.new_context(
             ignore_https_errors=True,
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            viewport={'width': 1920, 'height': 1080}
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=self.state_file if os.path.exists(self.state_file) else None
         )
         
-        self.page = await context.new_page()
+        if self.lite_mode:
+            await self.context.route('**/*', self._route_filter)
+        
+        self.page = await self.context.new_page()
         print("✅ Full-featured browser initialized (SSL verification disabled)")
     
-    async def navigate(self, url: str, timeout: int = 30000) -> dict:
-        """Navigate to URL"""
-        if not self.page:
-            await self.initialize()
+    async def _route_filter(self, route):
+        """Abort heavyweight subresources while lite mode is on"""
+        if route.request.resource_type in LITE_BLOCKED_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def set_lite_mode(self, enabled: bool) -> dict:
+        """Turn lite mode on/off (the route handler is only installed while it's on)"""
+        try:
+            if enabled != self.lite_mode and self.context:
+                if enabled:
+                    await self.context.route('**/*', self._route_filter)
+                else:
+                    await self.context.unroute('**/*', self._route_filter)
+            self.lite_mode = enabled
+            return {"success": True, "message": f"✅ Lite mode {'on' if enabled else 'off'}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    async def _do(self, awaitable, message: str) -> dict:
+        """Await one browser call and wrap the outcome in the usual result dict"""
+        try:
+            await awaitable
+            return {"success": True, "message": message}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _loc(self, selector: str):
+        """Cached locator for the first element matching selector (like page.click & co.)"""
+        locator = self._loc_cache.get(selector)
+        if locator is None:
+            if len(self._loc_cache) >= LOCATOR_CACHE_SIZE:
+                self._loc_cache.clear()
+            locator = self._loc_cache[selector] = self.page.locator(selector).first
+        return locator
+    
+    async def _ensure_page(self):
+        """Launch the browser on first use; the lock stops concurrent callers launching it twice"""
+        if self.page is None:
+            async with self._init_lock:
+                if self.page is None:
+                    await self.initialize()
+    
+    async def navigate(self, url: str, timeout: int = 30000, wait_for: Optional[str] = None,
+                       wait_until: str = 'commit') -> dict:
+        """Navigate to URL (returns once the response starts; wait_for waits for that element instead of the whole page)"""
+        await self._ensure_page()
         
         try:
             print(f"🌐 Navigating to: {url}")
-            response = await self.page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+            self._loc_cache.clear()
+            response = await self.page.goto(url, wait_until=wait_until, timeout=timeout)
+            if wait_for:
+                await self.page.wait_for_selector(wait_for, timeout=timeout)
             
             title = await self.page.title()
             url_final = self.page.url
@@ -71,7 +162,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.click(selector, timeout=10000)
+            await self._loc(selector).click(timeout=10000)
             return {"success": True, "message": f"✅ Clicked: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -82,7 +173,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.fill(selector, value, timeout=10000)
+            await self._loc(selector).fill(value, timeout=10000)
             return {"success": True, "message": f"✅ Filled: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -93,7 +184,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.type(selector, text, delay=delay)
+            await self._loc(selector).type(text, delay=delay)
             return {"success": True, "message": f"✅ Typed into: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -103,19 +194,11 @@ class FullFeaturedBrowser:
         if not self.page:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
-        try:
-            await self.page.keyboard.press(key)
-            return {"success": True, "message": f"✅ Pressed key: {key}"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return await self._do(self.page.keyboard.press(key), f"✅ Pressed key: {key}")
     
     async def wait(self, seconds: float) -> dict:
         """Wait for specified seconds"""
-        try:
-            await asyncio.sleep(seconds)
-            return {"success": True, "message": f"✅ Waited {seconds} seconds"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return await self._do(asyncio.sleep(seconds), f"✅ Waited {seconds} seconds")
     
     async def wait_for_selector(self, selector: str, timeout: int = 30000) -> dict:
         """Wait for element to appear"""
@@ -128,8 +211,9 @@ class FullFeaturedBrowser:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    async def screenshot(self, filename: str = "screenshot.png") -> dict:
-        """Take screenshot"""
+    async def screenshot(self, filename: str = "screenshot.png", full_page: bool = False,
+                         quality: Optional[int] = None) -> dict:
+        """Take screenshot (viewport by default; .jpg/.jpeg names are saved as JPEG, quality 70 unless given)"""
         if not self.page:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
@@ -139,19 +223,27 @@ class FullFeaturedBrowser:
             else:
                 filepath = filename
                 
-            await self.page.screenshot(path=filepath, full_page=True)
+            options = {}
+            if filename.lower().endswith(('.jpg', '.jpeg')):
+                # Much smaller and faster to encode than PNG
+                options = {"type": "jpeg", "quality": quality or 70}
+            await self.page.screenshot(path=filepath, full_page=full_page, **options)
             return {"success": True, "message": f"✅ Screenshot saved: screenshots/{filename}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    async def get_text(self, selector: str = "body") -> dict:
-        """Get text content of element or whole page"""
+    async def get_text(self, selector: str = "body", max_len: int = 4096) -> dict:
+        """Get text content of element or whole page (first max_len chars; -1 for all)"""
         if not self.page:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            text = await self.page.inner_text(selector)
-            return {"success": True, "text": text, "length": len(text)}
+            # Locator evaluate keeps Playwright selectors (text=, >>, :has-text()) and auto-wait
+            text, length = await self._loc(selector).evaluate(_TEXT_PREFIX_JS, max_len)
+            result = {"success": True, "text": text, "length": length}
+            if len(text) < length:
+                result["truncated"] = True
+            return result
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -161,7 +253,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            value = await self.page.input_value(selector)
+            value = await self._loc(selector).input_value()
             return {"success": True, "value": value}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -172,7 +264,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.select_option(selector, value)
+            await self._loc(selector).select_option(value)
             return {"success": True, "message": f"✅ Selected: {value}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -183,7 +275,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.check(selector)
+            await self._loc(selector).check()
             return {"success": True, "message": f"✅ Checked: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -194,7 +286,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.uncheck(selector)
+            await self._loc(selector).uncheck()
             return {"success": True, "message": f"✅ Unchecked: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -205,7 +297,7 @@ class FullFeaturedBrowser:
             return {"success": False, "error": "No page loaded. Navigate first."}
         
         try:
-            await self.page.hover(selector)
+            await self._loc(selector).hover()
             return {"success": True, "message": f"✅ Hovered: {selector}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -215,36 +307,66 @@ class FullFeaturedBrowser:
         if not self.page:
             return {"success": False, "error": "No page loaded."}
         
-        try:
-            await self.page.go_back()
-            return {"success": True, "message": "✅ Went back"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return await self._do(self.page.go_back(), "✅ Went back")
     
     async def go_forward(self) -> dict:
         """Go forward in browser history"""
         if not self.page:
             return {"success": False, "error": "No page loaded."}
         
-        try:
-            await self.page.go_forward()
-            return {"success": True, "message": "✅ Went forward"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return await self._do(self.page.go_forward(), "✅ Went forward")
     
     async def reload(self) -> dict:
         """Reload current page"""
         if not self.page:
             return {"success": False, "error": "No page loaded."}
         
+        return await self._do(self.page.reload(), "✅ Page reloaded")
+    
+    async def _run_op(self, op: Dict[str, Any]) -> dict:
+        """Call one batch op's method with its arguments"""
+        op = dict(op)
+        action = op.pop("action", None)
+        method = getattr(self, action, None) if action in BATCH_ACTIONS else None
+        if method is None:
+            return {"success": False, "error": f"Unknown batch action: {action}"}
         try:
-            await self.page.reload()
-            return {"success": True, "message": "✅ Page reloaded"}
-        except Exception as e:
+            return await method(**op)
+        except TypeError as e:  # wrong/missing arguments
             return {"success": False, "error": str(e)}
     
+    async def execute_batch(self, ops: List[Dict[str, Any]]) -> List[dict]:
+        """
+        Run [{"action": "click", "selector": "#go"}, {"action": "get_text", "selector": "h1"}, ...] in order
+        
+        Actions are the method names (navigate, click, fill, get_text, ...) with their
+        arguments as keys. Consecutive get_text/get_value reads are issued together
+        with asyncio.gather; everything else runs one at a time since it changes page state.
+        """
+        results: List[dict] = []
+        i = 0
+        while i < len(ops):
+            j = i
+            while j < len(ops) and ops[j].get("action") in BATCH_READ_ACTIONS:
+                j += 1
+            if j > i:
+                # Same get_text/get_value calls as one-off actions (selectors, max_len,
+                # result shape), just with their round-trips overlapped
+                results.extend(await asyncio.gather(*(self._run_op(op) for op in ops[i:j])))
+                i = j
+                continue
+            
+            results.append(await self._run_op(ops[i]))
+            i += 1
+        return results
+    
     async def cleanup(self):
         """Close browser"""
+        if self.context:
+            try:
+                await self.context.storage_state(path=self.state_file)
+            except Exception as e:
+                print(f"⚠️  Could not save browser state: {e}")
         if self.page:
             await self.page.close()
         if self.browser:
@@ -254,6 +376,46 @@ class FullFeaturedBrowser:
         print("🧹 Browser cleaned up")
 
 
+def _read_line(loop: asyncio.AbstractEventLoop, line_ready: asyncio.Future, prompt: str):
+    """Blocking input() on a helper thread, handing the line (or EOFError) back to the loop"""
+    try:
+        result = input(prompt)
+    except Exception as e:  # EOFError on Ctrl-D / end of redirected input
+        result = e
+    try:
+        loop.call_soon_threadsafe(_resolve_line, line_ready, result)
+    except RuntimeError:  # loop already closed
+        pass
+
+
+def _resolve_line(line_ready: asyncio.Future, result):
+    if line_ready.done():
+        return
+    if isinstance(result, Exception):
+        line_ready.set_exception(result)
+    else:
+        line_ready.set_result(result)
+
+
+async def ainput(prompt: str) -> str:
+    """input() that lets other tasks (like the browser warm-up) run while the user types"""
+    # Plain input() keeps working for ttys, pipes and redirected files alike. A daemon
+    # thread (not asyncio.to_thread) so Ctrl+C doesn't wait at exit for a pending read.
+    loop = asyncio.get_running_loop()
+    line_ready = loop.create_future()
+    threading.Thread(target=_read_line, args=(loop, line_ready, prompt), daemon=True).start()
+    return await line_ready
+
+
+async def _warm_up(browser: "FullFeaturedBrowser"):
+    """Launch the browser in the background so the first navigate doesn't wait for it"""
+    try:
+        await browser._ensure_page()
+    except Exception as e:
+        # navigate() will try again and report the error then
+        print(f"\n⚠️  Browser warm-up failed: {e}")
+
+
 async def main():
     """CLI Interface"""
     browser = FullFeaturedBrowser()
@@ -263,7 +425,7 @@ async def main():
     print("⚠️  WARNING: SSL Certificate Verification DISABLED")
     print("="*70)
     print("\n📍 Navigation:")
-    print("  navigate <url>           - Go to URL")
+    print("  navigate <url> [selector] - Go to URL (optionally wait for element)")
     print("  back                     - Go back")
     print("  forward                  - Go forward")
     print("  reload                   - Reload page")
@@ -279,7 +441,11 @@ async def main():
     print("\n📄 Content:")
     print("  text [selector]          - Get text content")
     print("  value <selector>         - Get input value")
-    print("  screenshot [filename]    - Take screenshot")
+    print("  screenshot [filename] [--full] [--quality N]")
+    print("                           - Take screenshot (viewport; .jpg for JPEG)")
+    print("  lite [on|off]            - Skip images/media/fonts/CSS (toggle)")
+    print("  batch <json list>        - Run several actions, e.g.")
+    print('                             batch [{"action":"click","selector":"#go"},{"action":"get_text","selector":"h1"}]')
     print("\n⏱️  Timing:")
     print("  wait <seconds>           - Wait N seconds")
     print("  waitfor <selector>       - Wait for element")
@@ -291,9 +457,12 @@ async def main():
     print("    Examples: #username, .btn-login, button[type='submit']")
     print("="*70)
     
+    warm_up = asyncio.create_task(_warm_up(browser))
+    
     try:
         while True:
-            command = input("\n> ").strip().split(maxsplit=2)
+            line = (await ainput("\n> ")).strip()
+            command = line.split(maxsplit=2)
             
             if not command:
                 continue
@@ -309,9 +478,10 @@ async def main():
             
             elif action == "navigate":
                 if len(command) < 2:
-                    print("❌ Usage: navigate <url>")
+                    print("❌ Usage: navigate <url> [selector]")
                     continue
-                result = await browser.navigate(command[1])
+                wait_for = command[2] if len(command) > 2 else None
+                result = await browser.navigate(command[1], wait_for=wait_for)
                 
             elif action == "click":
                 if len(command) < 2:
@@ -380,11 +550,10 @@ async def main():
                 
             elif action == "text":
                 selector = command[1] if len(command) > 1 else "body"
-                result = await browser.get_text(selector)
+                result = await browser.get_text(selector, max_len=1000)
                 if result.get("success"):
-                    text = result.get("text", "")
-                    print(f"\n📝 Text Content ({len(text)} chars):")
-                    print(text[:1000])
+                    print(f"\n📝 Text Content ({result['length']} chars):")
+                    print(result["text"])
                     continue
                     
             elif action == "value":
@@ -397,8 +566,43 @@ async def main():
                     continue
                     
             elif action == "screenshot":
-                filename = command[1] if len(command) > 1 else "screenshot.png"
-                result = await browser.screenshot(filename)
+                filename, full_page, quality = "screenshot.png", False, None
+                args = iter(line.split()[1:])
+                try:
+                    for arg in args:
+                        if arg == "--full":
+                            full_page = True
+                        elif arg == "--quality":
+                            quality = int(next(args))
+                        else:
+                            filename = arg
+                except (StopIteration, ValueError):
+                    print("❌ --quality needs a number (1-100)")
+                    continue
+                result = await browser.screenshot(filename, full_page=full_page, quality=quality)
+                
+            elif action == "lite":
+                if len(command) > 1:
+                    enabled = command[1].lower() in ("on", "1", "true", "yes")
+                else:
+                    enabled = not browser.lite_mode
+                result = await browser.set_lite_mode(enabled)
+                
+            elif action == "batch":
+                if len(command) < 2:
+                    print("❌ Usage: batch <json list of actions>")
+                    continue
+                try:
+                    ops = json.loads(line.split(maxsplit=1)[1])
+                except json.JSONDecodeError as e:
+                    print(f"❌ Invalid JSON: {e}")
+                    continue
+                if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+                    print("❌ Batch must be a JSON list of objects")
+                    continue
+                for op, op_result in zip(ops, await browser.execute_batch(ops)):
+                    print(f"{op.get('action')}: {json.dumps(op_result, ensure_ascii=False)[:500]}")
+                continue
                 
             elif action == "back":
                 result = await browser.go_back()
@@ -423,12 +627,18 @@ async def main():
             else:
                 print(f"❌ Error: {result.get('error')}")
     
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError, asyncio.CancelledError):
         print("\n\nExiting...")
     finally:
+        await warm_up
         await browser.cleanup()
 
 
 if __name__ == "__main__":
     print("\n🚀 Starting Full-Featured Unsafe Browser...\n")
-    asyncio.run(main())
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass